@@ -0,0 +1,123 @@
+"""Compiled episode loops for the TD agents.
+
+The kernels run a whole Q-learning or SARSA episode over MazeEnv's
+precomputed next_state/reward/done tables. Numba is optional: without it
+NUMBA_AVAILABLE is False and the agents keep their pure-Python loops.
+
+Each kernel reads its randomness from arrays peeked from the agent's
+RandomStream and performs the same floating point operations in the same
+order as the Python loop, so both engines produce identical Q-tables and
+metrics.
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator when numba is not installed"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+ENGINES = ('auto', 'numba', 'python')
+
+def resolve_engine(engine):
+    """Map 'auto' / 'numba' / 'python' to the engine that will actually run"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if engine == 'python' or not NUMBA_AVAILABLE:
+        return 'python'
+    return 'numba'
+
+@njit(cache=True)
+def _epsilon_greedy(Q, state, epsilon, uniform, random_action):
+    """Explore with the pre-drawn action, else the first maximal action like np.argmax"""
+    if uniform < epsilon:
+        return random_action
+    best = 0
+    for a in range(1, Q.shape[1]):
+        if Q[state, a] > Q[state, best]:
+            best = a
+    return best
+
+@njit(cache=True)
+def _track_write(stats, old_q, new_q):
+    """QTableStats.update on a packed state array (see QTableStats.pack)"""
+    stats[0] += new_q - old_q
+    stats[1] += new_q * new_q - old_q * old_q
+    if new_q >= stats[2]:
+        stats[2] = new_q
+    elif old_q >= stats[2]:
+        stats[4] = 1.0
+    if new_q <= stats[3]:
+        stats[3] = new_q
+    elif old_q <= stats[3]:
+        stats[5] = 1.0
+
+@njit(cache=True)
+def q_learning_episode(Q, next_state, reward, done, start, max_steps, alpha, gamma, epsilon,
+                       uniforms, random_actions, td_out, stats):
+    """One Q-learning episode; returns (steps, total_reward, discounted_return, success).
+
+    Uses one (uniform, random_action) pair per step. td_out receives each
+    step's TD error and stats (a packed QTableStats) tracks every Q write.
+    """
+    state = start
+    total_reward = 0.0
+    discounted_return = 0.0
+    for step in range(max_steps):
+        action = _epsilon_greedy(Q, state, epsilon, uniforms[step], random_actions[step])
+        s_next = next_state[state, action]
+        r = reward[state, action]
+
+        best_next = Q[s_next, 0]
+        for a in range(1, Q.shape[1]):
+            if Q[s_next, a] > best_next:
+                best_next = Q[s_next, a]
+        old_q = Q[state, action]
+        td = r + gamma * best_next - old_q
+        new_q = old_q + alpha * td
+        Q[state, action] = new_q
+
+        td_out[step] = td
+        _track_write(stats, old_q, new_q)
+        total_reward += r
+        discounted_return += (gamma ** float(step)) * r  # libm pow, as in Python
+        if done[state, action]:
+            return step + 1, total_reward, discounted_return, True
+        state = s_next
+    return max_steps, total_reward, discounted_return, False
+
+@njit(cache=True)
+def sarsa_episode(Q, next_state, reward, done, start, max_steps, alpha, gamma, epsilon,
+                  uniforms, random_actions, td_out, stats):
+    """One SARSA episode; returns (steps, total_reward, discounted_return, success).
+
+    Uses one pair for the first action plus one per step, so the random
+    arrays need max_steps + 1 entries.
+    """
+    state = start
+    action = _epsilon_greedy(Q, state, epsilon, uniforms[0], random_actions[0])
+    total_reward = 0.0
+    discounted_return = 0.0
+    for step in range(max_steps):
+        s_next = next_state[state, action]
+        r = reward[state, action]
+        a_next = _epsilon_greedy(Q, s_next, epsilon, uniforms[step + 1], random_actions[step + 1])
+
+        old_q = Q[state, action]
+        td = r + gamma * Q[s_next, a_next] - old_q
+        new_q = old_q + alpha * td
+        Q[state, action] = new_q
+
+        td_out[step] = td
+        _track_write(stats, old_q, new_q)
+        total_reward += r
+        discounted_return += (gamma ** float(step)) * r  # libm pow, as in Python
+        if done[state, action]:
+            return step + 1, total_reward, discounted_return, True
+        state = s_next
+        action = a_next
+    return max_steps, total_reward, discounted_return, False
@@ -0,0 +1,179 @@
+import numpy as np
+
+RETENTION_MODES = ('full', 'downsample', 'ring')
+
+class MetricSeries:
+    """One training metric stored in a preallocated float64 buffer.
+
+    Retention modes:
+      full        keep every value; the buffer doubles when it fills
+      downsample  keep at most `capacity` values; when full, every other point
+                  is dropped and the sampling stride doubles
+      ring        keep only the most recent `capacity` values
+
+    Independently of retention, the last `window` values are kept with running
+    sums so mean/std over that window are O(1).
+    """
+
+    def __init__(self, retention='downsample', capacity=10000, window=100):
+        if retention not in RETENTION_MODES:
+            raise ValueError(f"Unknown retention mode: {retention}")
+        self.retention = retention
+        self.capacity = capacity
+        self.stride = 1  # only grows in downsample mode
+        self.count = 0  # total values ever appended
+        self.last = None
+        self._buffer = np.empty(min(capacity, 1024) if retention == 'full' else capacity)
+        self._size = 0
+        self._head = 0  # oldest entry in ring mode
+
+        self._window = np.empty(window)
+        self._window_sum = 0.0
+        self._window_sumsq = 0.0
+        self._window_stale = False
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        value = float(value)
+        self._store(value)
+
+        slot = self.count % len(self._window)
+        if self.count >= len(self._window):
+            old = self._window[slot]
+            self._window_sum -= old
+            self._window_sumsq -= old * old
+        self._window[slot] = value
+        self._window_sum += value
+        self._window_sumsq += value * value
+        self.count += 1
+        self.last = value
+        if slot == len(self._window) - 1:
+            # Re-sum once per wrap so floating point drift cannot accumulate
+            self._window_sum = float(self._window.sum())
+            self._window_sumsq = float(np.dot(self._window, self._window))
+
+    def extend(self, values):
+        """Append many values at once (vectorized for ring series)"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        if self.retention != 'ring':
+            for value in values:
+                self.append(value)
+            return
+
+        tail = values[-self.capacity:]
+        positions = (self._head + self._size + np.arange(len(tail))) % self.capacity
+        self._buffer[positions] = tail
+        overflow = max(0, self._size + len(tail) - self.capacity)
+        self._size = min(self.capacity, self._size + len(tail))
+        self._head = (self._head + overflow) % self.capacity
+
+        width = len(self._window)
+        slots = (self.count + np.arange(len(values))[-width:]) % width
+        self._window[slots] = values[-width:]
+        self.count += len(values)
+        self.last = float(values[-1])
+        self._window_stale = True  # re-summed lazily by mean/std
+
+    def _store(self, value):
+        if self.retention == 'ring':
+            if self._size < self.capacity:
+                self._buffer[(self._head + self._size) % self.capacity] = value
+                self._size += 1
+            else:
+                self._buffer[self._head] = value
+                self._head = (self._head + 1) % self.capacity
+            return
+
+        if self.count % self.stride:
+            return
+        if self._size == len(self._buffer):
+            if self.retention == 'full':
+                self._buffer = np.concatenate([self._buffer, np.empty(len(self._buffer))])
+            else:
+                half = self._buffer[:self._size:2]
+                self._size = len(half)
+                self._buffer[:self._size] = half
+                self.stride *= 2
+                if self.count % self.stride:
+                    return
+        self._buffer[self._size] = value
+        self._size += 1
+
+    def values(self):
+        """Stored values in chronological order (a copy)"""
+        if self.retention == 'ring':
+            return np.roll(self._buffer[:self._size], -self._head) if self._size == self.capacity else self._buffer[:self._size].copy()
+        return self._buffer[:self._size].copy()
+
+    def tolist(self):
+        return self.values().tolist()
+
+    def _recent(self, n=None):
+        """The last min(n, window) values in chronological order"""
+        width = len(self._window)
+        filled = min(self.count, width)
+        n = filled if n is None else min(n, filled)
+        end = self.count % width
+        indices = (end - n + np.arange(n)) % width
+        return self._window[indices]
+
+    def _window_sums(self):
+        if self._window_stale:
+            recent = self._recent()
+            self._window_sum = float(recent.sum())
+            self._window_sumsq = float(np.dot(recent, recent))
+            self._window_stale = False
+        return self._window_sum, self._window_sumsq
+
+    def mean(self, n=None):
+        """Mean of the last n values; O(1) when n covers the whole window"""
+        filled = min(self.count, len(self._window))
+        if filled == 0:
+            return 0.0
+        if n is None or n >= filled:
+            return self._window_sums()[0] / filled
+        return float(np.mean(self._recent(n)))
+
+    def std(self, n=None):
+        filled = min(self.count, len(self._window))
+        if filled == 0:
+            return 0.0
+        if n is None or n >= filled:
+            window_sum, window_sumsq = self._window_sums()
+            mean = window_sum / filled
+            return float(np.sqrt(max(window_sumsq / filled - mean * mean, 0.0)))
+        return float(np.std(self._recent(n)))
+
+    def min(self, n=None):
+        return float(np.min(self._recent(n))) if self.count else 0.0
+
+    def percentile(self, q, n=None):
+        return float(np.percentile(self._recent(n), q)) if self.count else 0.0
+
+class MetricsRecorder:
+    """Creates the metric series for one agent with a shared retention policy"""
+
+    def __init__(self, retention='downsample', capacity=10000, window=100):
+        self.retention = retention
+        self.capacity = capacity
+        self.window = window
+        self.series = {}
+
+    def add(self, name, **overrides):
+        """Register and return a new series; overrides replace the recorder defaults"""
+        options = {'retention': self.retention, 'capacity': self.capacity, 'window': self.window}
+        options.update(overrides)
+        self.series[name] = MetricSeries(**options)
+        return self.series[name]
+
+    @property
+    def stride(self):
+        """Episodes between stored points of the per-episode histories"""
+        return max((s.stride for s in self.series.values()), default=1)
+
+    def nbytes(self):
+        return sum(s._buffer.nbytes + s._window.nbytes for s in self.series.values())
@@ -1,58 +1,66 @@
 import numpy as np
 from collections import defaultdict
+from agents.metrics import MetricsRecorder
+from agents.q_stats import QTableStats
+from agents.rng import RandomStream
+
+METHODS = ('first_visit', 'every_visit')
+RETURNS_MODES = ('incremental', 'full')
 
 class MonteCarloAgent:
     """Monte Carlo: Learns from complete episodes"""
     
-    def __init__(self, n_states, n_actions, gamma=0.99, epsilon=0.15, method='first_visit', optimistic_init=0.0):
+    def __init__(self, n_states, n_actions, gamma=0.99, epsilon=0.15, method='first_visit', optimistic_init=0.0, returns_mode='incremental', step_size=None, metrics_retention='downsample', metrics_capacity=10000, q_stats_every=1, rng=None):
         self.n_states = n_states
         self.n_actions = n_actions
         self.gamma = gamma
         self.epsilon = epsilon
         self.epsilon_initial = epsilon
         self.method = method
+        self.returns_mode = returns_mode  # 'incremental' (running mean) or 'full' (keep every return)
+        self.step_size = step_size  # constant step size instead of the sample average
         
         self.Q = np.full((n_states, n_actions), optimistic_init, dtype=float)
-        self.returns = defaultdict(lambda: defaultdict(list))
+        self.returns = defaultdict(lambda: defaultdict(list))  # only filled in 'full' mode
         self.visit_counts = np.zeros((n_states, n_actions), dtype=int)
         self.policy = np.zeros(n_states, dtype=int)
         self.episode_count = 0
         self.success_count = 0
         
-        self.episode_lengths = []
-        self.episode_returns = []
-        self.discounted_returns = []
-        self.training_losses = []
-        self.q_value_history = {'mean': [], 'max': [], 'min': [], 'std': []}
-        self.loss_history = []
+        self.metrics = MetricsRecorder(retention=metrics_retention, capacity=metrics_capacity)
+        self.episode_lengths = self.metrics.add('episode_lengths')
+        self.episode_returns = self.metrics.add('episode_returns')
+        self.discounted_returns = self.metrics.add('discounted_returns')
+        self.loss_history = self.metrics.add('loss_history')
+        self.training_losses = self.loss_history
+        self.q_value_history = {stat: self.metrics.add(f'q_{stat}') for stat in ('mean', 'max', 'min', 'std')}
+        self.q_stats = QTableStats(self.Q)
+        self.q_stats_every = q_stats_every  # episodes between Q-value history samples
+        self.random = RandomStream(rng, n_actions)  # accepts a seed or a numpy Generator
+
+    def load_q_table(self, Q, prior_visits=1):
+        """Start from an existing Q-table, e.g. a previous job's (warm start).
+        
+        Each loaded value counts as prior_visits returns in the running
+        mean, so the first real return no longer overwrites it.
+        """
+        self.Q[:] = Q
+        self.visit_counts[:] = prior_visits
+        self.q_stats.reset()
 
     def select_action(self, state, epsilon=None):
         """Pick action: explore or exploit"""
         if epsilon is None:
             epsilon = self.epsilon
-        if np.random.rand() < epsilon:
-            return np.random.randint(self.n_actions)
+        u, random_action = self.random.next()
+        if u < epsilon:
+            return random_action
         return int(np.argmax(self.Q[state]))
 
     def generate_episode(self, env, max_steps=200, epsilon=None, exploring_start=True):
         """Run through maze once, collecting experience"""
-        if exploring_start and np.random.rand() < 0.85:
-            valid_states = [s for s in range(env.n_states) if env.grid[s] != 0]
-            if len(valid_states) > 0:
-                goal_r, goal_c = env.goal // env.cols, env.goal % env.cols
-                distances = []
-                for s in valid_states:
-                    r, c = s // env.cols, s % env.cols
-                    dist = abs(r - goal_r) + abs(c - goal_c)
-                    distances.append(dist)
-                
-                max_dist = max(distances) + 1
-                weights = [max_dist - d for d in distances]
-                total_weight = sum(weights)
-                probs = [w / total_weight for w in weights]
-                state = np.random.choice(valid_states, p=probs)
-            else:
-                state = env.reset()
+        if exploring_start and self.random.uniform() < 0.85:
+            state = env.sample_exploring_start(self.random.uniform())
         else:
             state = env.reset()
         
@@ -76,7 +84,8 @@ class MonteCarloAgent:
         for t in reversed(range(len(episode))):
             state, action, reward = episode[t]
             G = reward + self.gamma * G
-            returns.insert(0, G)
+            returns.append(G)
+        returns.reverse()
         return returns
 
     def update_q_values(self, episode, returns):
@@ -86,6 +95,23 @@ class MonteCarloAgent:
         else:
             return self._every_visit_mc(episode, returns)
 
+    def _update_cell(self, state, action, G):
+        """Move Q[state, action] toward return G and return its old value"""
+        old_q = float(self.Q[state, action])
+        self.visit_counts[state, action] += 1
+        if self.returns_mode == 'full':
+            self.returns[state][action].append(G)
+            new_q = float(np.mean(self.returns[state][action]))
+        elif self.step_size is not None:
+            new_q = old_q + self.step_size * (G - old_q)
+        else:
+            # Running sample average; the first visit replaces the initial value
+            n = int(self.visit_counts[state, action])
+            new_q = G if n == 1 else old_q + (G - old_q) / n
+        self.Q[state, action] = new_q
+        self.q_stats.update(old_q, new_q)
+        return old_q
+
     def _first_visit_mc(self, episode, returns):
         """Update only on first occurrence of each state-action pair"""
         visited = set()
@@ -95,10 +121,7 @@ class MonteCarloAgent:
             state_action = (state, action)
             if state_action not in visited:
                 visited.add(state_action)
-                old_q = self.Q[state, action]
-                self.returns[state][action].append(returns[t])
-                self.visit_counts[state, action] += 1
-                self.Q[state, action] = np.mean(self.returns[state][action])
+                old_q = self._update_cell(state, action, returns[t])
                 
                 prediction_error = returns[t] - old_q
                 episode_squared_errors.append(prediction_error ** 2)
@@ -109,10 +132,7 @@ class MonteCarloAgent:
         episode_squared_errors = []
         
         for t, (state, action, _) in enumerate(episode):
-            old_q = self.Q[state, action]
-            self.returns[state][action].append(returns[t])
-            self.visit_counts[state, action] += 1
-            self.Q[state, action] = np.mean(self.returns[state][action])
+            old_q = self._update_cell(state, action, returns[t])
             
             prediction_error = returns[t] - old_q
             episode_squared_errors.append(prediction_error ** 2)
@@ -132,7 +152,6 @@ class MonteCarloAgent:
         self.discounted_returns.append(discounted_return)
         
         episode_loss = float(np.mean(episode_squared_errors)) if len(episode_squared_errors) > 0 else 0.0
-        self.training_losses.append(episode_loss)
         self.loss_history.append(episode_loss)
         self._update_q_value_stats()
         
@@ -143,10 +162,10 @@ class MonteCarloAgent:
     
     def _update_q_value_stats(self):
         """Track Q-value statistics"""
-        self.q_value_history['mean'].append(float(np.mean(self.Q)))
-        self.q_value_history['max'].append(float(np.max(self.Q)))
-        self.q_value_history['min'].append(float(np.min(self.Q)))
-        self.q_value_history['std'].append(float(np.std(self.Q)))
+        if (len(self.episode_returns) - 1) % self.q_stats_every:
+            return
+        for stat, value in zip(('mean', 'max', 'min', 'std'), self.q_stats.snapshot()):
+            self.q_value_history[stat].append(value)
     
     def get_metrics_summary(self, last_n=100):
         """Get recent performance stats"""
@@ -154,29 +173,25 @@ class MonteCarloAgent:
             return {}
         
         return {
-            'avg_return': float(np.mean(self.episode_returns[-last_n:])),
-            'std_return': float(np.std(self.episode_returns[-last_n:])),
-            'avg_discounted_return': float(np.mean(self.discounted_returns[-last_n:])),
-            'avg_episode_length': float(np.mean(self.episode_lengths[-last_n:])),
-            'min_episode_length': float(np.min(self.episode_lengths[-last_n:])),
+            'avg_return': self.episode_returns.mean(last_n),
+            'std_return': self.episode_returns.std(last_n),
+            'avg_discounted_return': self.discounted_returns.mean(last_n),
+            'avg_episode_length': self.episode_lengths.mean(last_n),
+            'min_episode_length': self.episode_lengths.min(last_n),
             'avg_td_error': 0.0,
-            'training_loss': float(np.mean(self.training_losses[-last_n:])) if len(self.training_losses) > 0 else 0.0,
-            'final_loss': self.training_losses[-1] if len(self.training_losses) > 0 else 0.0,
-            'q_value_mean': self.q_value_history['mean'][-1] if self.q_value_history['mean'] else 0.0,
-            'q_value_max': self.q_value_history['max'][-1] if self.q_value_history['max'] else 0.0,
-            'q_value_min': self.q_value_history['min'][-1] if self.q_value_history['min'] else 0.0,
-            'q_value_std': self.q_value_history['std'][-1] if self.q_value_history['std'] else 0.0,
-            'return_p25': float(np.percentile(self.episode_returns[-last_n:], 25)),
-            'return_p50': float(np.percentile(self.episode_returns[-last_n:], 50)),
-            'return_p75': float(np.percentile(self.episode_returns[-last_n:], 75)),
+            'training_loss': self.training_losses.mean(last_n),
+            'final_loss': self.training_losses.last if len(self.training_losses) > 0 else 0.0,
+            'q_value_mean': self.q_value_history['mean'].last if len(self.q_value_history['mean']) else 0.0,
+            'q_value_max': self.q_value_history['max'].last if len(self.q_value_history['max']) else 0.0,
+            'q_value_min': self.q_value_history['min'].last if len(self.q_value_history['min']) else 0.0,
+            'q_value_std': self.q_value_history['std'].last if len(self.q_value_history['std']) else 0.0,
+            'return_p25': self.episode_returns.percentile(25, last_n),
+            'return_p50': self.episode_returns.percentile(50, last_n),
+            'return_p75': self.episode_returns.percentile(75, last_n),
         }
 
     def get_policy(self, env):
-        """Get best action for each position"""
-        policy = []
-        for s in range(env.n_states):
-            if env.grid[s] == 0 or env.grid[s] == 3:
-                policy.append(None)
-            else:
-                policy.append(int(np.argmax(self.Q[s])))
+        """Get best action for each position as int8; -1 for walls and the goal"""
+        policy = np.argmax(self.Q, axis=1).astype(np.int8)
+        policy[env.policy_mask] = -1
         return policy
@@ -1,9 +1,13 @@
 import numpy as np
+from agents.metrics import MetricsRecorder
+from agents.q_stats import QTableStats
+from agents.rng import RandomStream
+from agents.kernels import q_learning_episode, resolve_engine
 
 class QLearningAgent:
     """Q-Learning: Learns optimal policy through trial and error"""
     
-    def __init__(self, n_states, n_actions, alpha=0.3, gamma=0.99, epsilon=0.15):
+    def __init__(self, n_states, n_actions, alpha=0.3, gamma=0.99, epsilon=0.15, metrics_retention='downsample', metrics_capacity=10000, q_stats_every=1, rng=None, engine='auto'):
         self.n_states = n_states
         self.n_actions = n_actions
         self.alpha = alpha  # Learning rate
@@ -12,29 +16,43 @@ class QLearningAgent:
         self.Q = np.zeros((n_states, n_actions), dtype=float)  # Q-table: stores values for each (state, action) pair
         
         # Track performance over time
-        self.td_errors = []
-        self.episode_lengths = []
-        self.episode_returns = []
-        self.discounted_returns = []
-        self.training_losses = []
-        self.q_value_history = {'mean': [], 'max': [], 'min': [], 'std': []}
-        self.loss_history = []
+        self.metrics = MetricsRecorder(retention=metrics_retention, capacity=metrics_capacity)
+        self.td_errors = self.metrics.add('td_errors', retention='ring', capacity=1000, window=1000)
+        self.episode_lengths = self.metrics.add('episode_lengths')
+        self.episode_returns = self.metrics.add('episode_returns')
+        self.discounted_returns = self.metrics.add('discounted_returns')
+        self.loss_history = self.metrics.add('loss_history')
+        self.training_losses = self.loss_history
+        self.q_value_history = {stat: self.metrics.add(f'q_{stat}') for stat in ('mean', 'max', 'min', 'std')}
+        self.q_stats = QTableStats(self.Q)
+        self.q_stats_every = q_stats_every  # episodes between Q-value history samples
+        self.random = RandomStream(rng, n_actions)  # accepts a seed or a numpy Generator
+        self.engine = resolve_engine(engine)  # 'numba' runs whole episodes in a compiled kernel
+
+    def load_q_table(self, Q):
+        """Start from an existing Q-table, e.g. a previous job's (warm start)"""
+        self.Q[:] = Q
+        self.q_stats.reset()
 
     def select_action(self, state, epsilon=None):
         """Choose action: explore randomly or exploit best known action"""
         if epsilon is None:
             epsilon = self.epsilon
-        if np.random.rand() < epsilon:
-            return np.random.randint(self.n_actions)  # Explore
+        u, random_action = self.random.next()
+        if u < epsilon:
+            return random_action  # Explore
         return int(np.argmax(self.Q[state]))  # Exploit
 
     def run_episode(self, env, max_steps=200, epsilon=None, exploring_start=False):
         """Run one training episode"""
+        if self.engine == 'numba':
+            return self._run_episode_compiled(env, max_steps, epsilon)
         state = env.reset()
         total_reward = 0
         discounted_return = 0
         episode_td_errors = []
         episode_squared_errors = []
+        success = False
         
         for step in range(max_steps):
             action = self.select_action(state, epsilon)
@@ -42,43 +60,64 @@ class QLearningAgent:
             
             # Q-Learning update: learn from best possible next action
             best_next = np.max(self.Q[next_state])
-            td = reward + self.gamma * best_next - self.Q[state, action]
+            old_q = float(self.Q[state, action])
+            td = reward + self.gamma * best_next - old_q
             
             episode_td_errors.append(abs(td))
-            episode_squared_errors.append(td ** 2)
+            episode_squared_errors.append(td * td)
             
-            self.Q[state, action] += self.alpha * td
+            new_q = old_q + self.alpha * td
+            self.Q[state, action] = new_q
+            self.q_stats.update(old_q, new_q)
             total_reward += reward
             discounted_return += (self.gamma ** step) * reward
             state = next_state
             
             if done:
-                self._record_metrics(step + 1, total_reward, discounted_return, episode_td_errors, episode_squared_errors)
-                return total_reward, True
+                success = True
+                break
         
-        # Episode timed out
-        self._record_metrics(max_steps, total_reward, discounted_return, episode_td_errors, episode_squared_errors)
-        return total_reward, False
-    
+        self._record_metrics(step + 1 if success else max_steps, total_reward, discounted_return, episode_td_errors, episode_squared_errors)
+        return total_reward, success
+
+    def _run_episode_compiled(self, env, max_steps, epsilon):
+        """run_episode through the compiled kernel; same randomness, same results"""
+        if epsilon is None:
+            epsilon = self.epsilon
+        start = env.reset()
+        uniforms, random_actions = self.random.peek(max_steps)
+        td = np.empty(max_steps)
+        stats = self.q_stats.pack()
+        steps, total_reward, discounted_return, success = q_learning_episode(
+            self.Q, env.next_state, env.reward, env.done, start, max_steps,
+            self.alpha, self.gamma, epsilon, uniforms, random_actions, td, stats,
+        )
+        self.random.advance(steps)
+        self.q_stats.unpack(stats, steps)
+        td = td[:steps]
+        self._record_metrics(steps, total_reward, discounted_return, np.abs(td), td * td)
+        return total_reward, success
+
     def _record_metrics(self, length, total_reward, discounted_return, td_errors, squared_errors):
         """Save episode statistics"""
+        self.td_errors.extend(td_errors)
+        episode_loss = float(np.mean(squared_errors)) if len(squared_errors) > 0 else 0.0
+        self._record_episode(length, total_reward, discounted_return, episode_loss)
+    
+    def _record_episode(self, length, total_reward, discounted_return, episode_loss):
+        """Save one finished episode"""
         self.episode_lengths.append(length)
         self.episode_returns.append(total_reward)
         self.discounted_returns.append(discounted_return)
-        self.td_errors.extend(td_errors)
-        
-        episode_loss = float(np.mean(squared_errors)) if len(squared_errors) > 0 else 0.0
-        self.training_losses.append(episode_loss)
         self.loss_history.append(episode_loss)
-        
         self._update_q_value_stats()
     
     def _update_q_value_stats(self):
         """Track Q-table statistics over time"""
-        self.q_value_history['mean'].append(float(np.mean(self.Q)))
-        self.q_value_history['max'].append(float(np.max(self.Q)))
-        self.q_value_history['min'].append(float(np.min(self.Q)))
-        self.q_value_history['std'].append(float(np.std(self.Q)))
+        if (len(self.episode_returns) - 1) % self.q_stats_every:
+            return
+        for stat, value in zip(('mean', 'max', 'min', 'std'), self.q_stats.snapshot()):
+            self.q_value_history[stat].append(value)
     
     def get_metrics_summary(self, last_n=100):
         """Get recent performance statistics"""
@@ -86,29 +125,25 @@ class QLearningAgent:
             return {}
         
         return {
-            'avg_return': float(np.mean(self.episode_returns[-last_n:])),
-            'std_return': float(np.std(self.episode_returns[-last_n:])),
-            'avg_discounted_return': float(np.mean(self.discounted_returns[-last_n:])),
-            'avg_episode_length': float(np.mean(self.episode_lengths[-last_n:])),
-            'min_episode_length': float(np.min(self.episode_lengths[-last_n:])),
-            'avg_td_error': float(np.mean(self.td_errors[-1000:])) if len(self.td_errors) > 0 else 0.0,
-            'training_loss': float(np.mean(self.training_losses[-last_n:])) if len(self.training_losses) > 0 else 0.0,
-            'final_loss': self.training_losses[-1] if len(self.training_losses) > 0 else 0.0,
-            'q_value_mean': self.q_value_history['mean'][-1] if self.q_value_history['mean'] else 0.0,
-            'q_value_max': self.q_value_history['max'][-1] if self.q_value_history['max'] else 0.0,
-            'q_value_min': self.q_value_history['min'][-1] if self.q_value_history['min'] else 0.0,
-            'q_value_std': self.q_value_history['std'][-1] if self.q_value_history['std'] else 0.0,
-            'return_p25': float(np.percentile(self.episode_returns[-last_n:], 25)),
-            'return_p50': float(np.percentile(self.episode_returns[-last_n:], 50)),
-            'return_p75': float(np.percentile(self.episode_returns[-last_n:], 75)),
+            'avg_return': self.episode_returns.mean(last_n),
+            'std_return': self.episode_returns.std(last_n),
+            'avg_discounted_return': self.discounted_returns.mean(last_n),
+            'avg_episode_length': self.episode_lengths.mean(last_n),
+            'min_episode_length': self.episode_lengths.min(last_n),
+            'avg_td_error': self.td_errors.mean(),
+            'training_loss': self.training_losses.mean(last_n),
+            'final_loss': self.training_losses.last if len(self.training_losses) > 0 else 0.0,
+            'q_value_mean': self.q_value_history['mean'].last if len(self.q_value_history['mean']) else 0.0,
+            'q_value_max': self.q_value_history['max'].last if len(self.q_value_history['max']) else 0.0,
+            'q_value_min': self.q_value_history['min'].last if len(self.q_value_history['min']) else 0.0,
+            'q_value_std': self.q_value_history['std'].last if len(self.q_value_history['std']) else 0.0,
+            'return_p25': self.episode_returns.percentile(25, last_n),
+            'return_p50': self.episode_returns.percentile(50, last_n),
+            'return_p75': self.episode_returns.percentile(75, last_n),
         }
 
     def get_policy(self, env):
-        """Extract best action for each state"""
-        policy = []
-        for s in range(env.n_states):
-            if env.grid[s] == 0 or env.grid[s] == 3:  # Wall or goal
-                policy.append(None)
-            else:
-                policy.append(int(np.argmax(self.Q[s])))
+        """Extract best action for each state as int8; -1 for walls and the goal"""
+        policy = np.argmax(self.Q, axis=1).astype(np.int8)
+        policy[env.policy_mask] = -1
         return policy
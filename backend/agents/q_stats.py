@@ -0,0 +1,65 @@
+import numpy as np
+
+class QTableStats:
+    """Running mean/max/min/std of a Q-table, kept up to date as cells change.
+
+    Agents report every write with update(old, new). Sum and sum of squares
+    are adjusted in O(1). The max/min are only rescanned when the cell
+    holding the extremum moves inward, which is rare once learning settles.
+    A full resync every `resync_every` table sizes' worth of updates bounds
+    floating point drift.
+    """
+
+    def __init__(self, Q, resync_every=100):
+        self.Q = Q
+        self.resync_every = resync_every
+        self.reset()
+
+    def reset(self):
+        """Rescan the whole table, e.g. after Q was replaced or loaded"""
+        self._sum = float(np.sum(self.Q))
+        self._sumsq = float(np.sum(np.square(self.Q)))
+        self._max = float(np.max(self.Q))
+        self._min = float(np.min(self.Q))
+        self._max_stale = False
+        self._min_stale = False
+        self._updates = 0
+
+    def update(self, old, new):
+        """Account for one cell changing from old to new"""
+        self._sum += new - old
+        self._sumsq += new * new - old * old
+        if new >= self._max:
+            self._max = new
+        elif old >= self._max:
+            self._max_stale = True
+        if new <= self._min:
+            self._min = new
+        elif old <= self._min:
+            self._min_stale = True
+        self._updates += 1
+
+    def pack(self):
+        """Running state as a float array [sum, sumsq, max, min, max_stale, min_stale] for kernels"""
+        return np.array([self._sum, self._sumsq, self._max, self._min, self._max_stale, self._min_stale], dtype=float)
+
+    def unpack(self, state, n_updates):
+        """Adopt a state array advanced by a kernel that applied n_updates writes"""
+        self._sum, self._sumsq, self._max, self._min = (float(v) for v in state[:4])
+        self._max_stale = bool(state[4])
+        self._min_stale = bool(state[5])
+        self._updates += n_updates
+
+    def snapshot(self):
+        """Current (mean, max, min, std) of the table"""
+        if self._updates > self.resync_every * self.Q.size:
+            self.reset()
+        if self._max_stale:
+            self._max = float(np.max(self.Q))
+            self._max_stale = False
+        if self._min_stale:
+            self._min = float(np.min(self.Q))
+            self._min_stale = False
+        mean = self._sum / self.Q.size
+        std = float(np.sqrt(max(self._sumsq / self.Q.size - mean * mean, 0.0)))
+        return mean, self._max, self._min, std
@@ -0,0 +1,59 @@
+import numpy as np
+
+class RandomStream:
+    """Epsilon-greedy randomness drawn from a numpy Generator in blocks.
+
+    Every draw is a pair (uniform, random_action): the uniform decides whether
+    to explore and the action is used if it does. Pairs are generated
+    `block_size` at a time, which is much cheaper than calling the legacy global
+    RNG once or twice per step. Blocks are always drawn in the same sizes, so a
+    given seed produces the same sequence whether pairs are consumed one at a
+    time (next) or in slices (peek/advance).
+    """
+
+    def __init__(self, rng=None, n_actions=4, block_size=4096):
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.n_actions = n_actions
+        self.block_size = block_size
+        self._uniforms = np.empty(0)
+        self._actions = np.empty(0, dtype=np.int64)
+        self._uniform_list = []
+        self._action_list = []
+        self._pos = 0
+
+    def _refill(self, needed):
+        """Keep unread pairs and append whole blocks until `needed` are available"""
+        uniforms = [self._uniforms[self._pos:]]
+        actions = [self._actions[self._pos:]]
+        available = len(uniforms[0])
+        while available < needed:
+            uniforms.append(self.rng.random(self.block_size))
+            actions.append(self.rng.integers(self.n_actions, size=self.block_size))
+            available += self.block_size
+        self._uniforms = np.concatenate(uniforms)
+        self._actions = np.concatenate(actions)
+        self._uniform_list = self._uniforms.tolist()
+        self._action_list = self._actions.tolist()
+        self._pos = 0
+
+    def next(self):
+        """Next (uniform, random_action) pair"""
+        if self._pos >= len(self._uniform_list):
+            self._refill(1)
+        i = self._pos
+        self._pos = i + 1
+        return self._uniform_list[i], self._action_list[i]
+
+    def uniform(self):
+        """Next uniform in [0, 1); consumes a whole pair"""
+        return self.next()[0]
+
+    def peek(self, n):
+        """Arrays of the next n pairs without consuming them (see advance)"""
+        if len(self._uniforms) - self._pos < n:
+            self._refill(n)
+        return self._uniforms[self._pos:self._pos + n], self._actions[self._pos:self._pos + n]
+
+    def advance(self, n):
+        """Consume n pairs previously returned by peek"""
+        self._pos += n
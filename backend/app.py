@@ -1,17 +1,30 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
-from typing import List, Optional
-import threading
-import time
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional
+from concurrent.futures import FIRST_COMPLETED, wait
+import asyncio
+import json
 import uuid
 import os
 import logging
-from envs.maze_env import MazeEnv
-from agents.q_learning import QLearningAgent
-from agents.monte_carlo import MonteCarloAgent
-from agents.sarsa import SarsaAgent
+import threading
+import time
+import zlib
+import numpy as np
+from agents.kernels import ENGINES
+from agents.monte_carlo import METHODS as MC_METHODS, RETURNS_MODES as MC_RETURNS_MODES
+from envs.maze_generator import generate_maze
+from planners.dynamic_programming import PLANNERS
+from training.cache import ResultCache, cache_key
+from training.downsample import METHODS as DOWNSAMPLE_METHODS, downsample
+from training.encoding import DTYPES, LAYOUTS, encode_binary, encode_npz, policy_list
+from training.events import JobEvents
+from training.runner import build_env, combine_seeds, run_training, seed_params, seed_progress, uses_shaping
+from training.scheduler import TrainingScheduler, QueueFullError
+from training.store import create_job_store
+from training.sweep import METRICS as SWEEP_METRICS, SuccessiveHalving, rung_budgets, sample_configs
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +44,18 @@ async def startup_event():
     logger.info("Port: 8000")
     logger.info("Docs: http://localhost:8000/docs")
     logger.info("="*60)
+    
+    # Jobs interrupted by a restart continue from their last checkpoint
+    backlog = list(JOBS.unfinished())
+    for job_id, params in backlog:
+        JOBS[job_id]['status'] = 'queued'
+        JOBS[job_id]['revision'] = JOBS[job_id].get('revision', 0) + 1
+    if backlog:
+        threading.Thread(target=_resume_jobs, args=(backlog,), daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    SCHEDULER.shutdown()
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,7 +69,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-JOBS = {}
+JOBS = create_job_store()
+COMPARISONS = {}
+SWEEPS = {}
+EVENTS = JobEvents()
+RESULT_CACHE = ResultCache()
+
+PROGRESS_FIELDS = ('status', 'progress', 'episode', 'episodes', 'avg_reward', 'success_rate')
+MAX_MAZE_CELLS = int(os.environ.get('MAZE_MAX_CELLS', 1_000_000))
+# Larger policies and Q-tables are left out of JSON responses; /policy/{id}.bin carries them
+JSON_STATE_LIMIT = int(os.environ.get('MAZE_JSON_STATE_LIMIT', 20000))
+# Default /status shape; the policy, Q-table and histories come from /policy and /metrics
+STATUS_FIELDS = PROGRESS_FIELDS + ('logs', 'cached', 'converged_episode', 'greedy_eval')
+
+def _apply_progress(job_id, fields):
+    """Merge a progress message from a training worker into its job record"""
+    job = JOBS.get(job_id)
+    if job is None or job['status'] in ('finished', 'error'):
+        return
+    rewards = fields.pop('rewards', None)
+    job.update(fields)
+    job['revision'] = job.get('revision', 0) + 1
+    if rewards:
+        job['logs'] = (job['logs'] + rewards)[-200:]
+        fields['rewards'] = rewards
+    JOBS.save(job_id)
+    EVENTS.publish(job_id, {'type': 'progress', **fields})
+
+def _apply_result(job_id, result, error):
+    """Store the outcome of a finished training job"""
+    job = JOBS.get(job_id)
+    if job is None:
+        return
+    job['revision'] = job.get('revision', 0) + 1
+    if error == 'cancelled':
+        # Shut down before a worker picked it up; a persistent store resumes it on restart
+        job['status'] = 'queued'
+        JOBS.save(job_id)
+        return
+    if error is not None:
+        logger.error(f"Training job {job_id[:8]} failed: {error}")
+        job['status'] = 'error'
+        JOBS.save(job_id)
+        EVENTS.publish(job_id, {'type': 'error', 'status': 'error'})
+        return
+    job.update(result)
+    JOBS.save(job_id)
+    EVENTS.publish(job_id, _final_event(job))
+    if job.get('cache_key'):
+        RESULT_CACHE.put(job['cache_key'], result)
+    
+    metrics = result['detailed_metrics']
+    final_success_rate = job['success_rate'] * 100 if job['success_rate'] else 0
+    logger.info("="*60)
+    logger.info(f"✅ Training Complete - Success Rate: {final_success_rate:.1f}%")
+    logger.info(f"Time: {metrics['training_duration']:.2f}s - Speed: {metrics.get('episodes_per_sec', 0):.1f} eps/sec")
+    logger.info("="*60)
+
+def _final_event(job):
+    """The one message carrying the learned policy and Q-table (if small enough for JSON)"""
+    return {
+        'type': 'finished',
+        **{key: job[key] for key in PROGRESS_FIELDS},
+        'rewards': job['logs'],
+        'rows': job.get('rows'),
+        'cols': job.get('cols'),
+        'policy': _json_policy(job.get('policy')),
+        'q_table': _json_q_table(job.get('q_table')),
+    }
+
+def _json_policy(policy):
+    if policy is None or len(policy) > JSON_STATE_LIMIT:
+        return None
+    return policy_list(policy)
+
+def _json_q_table(q_table):
+    if q_table is None or len(q_table) > JSON_STATE_LIMIT:
+        return None
+    return np.asarray(q_table).tolist()
+
+SCHEDULER = TrainingScheduler(on_progress=_apply_progress, on_done=_apply_result)
 
 class TrainRequest(BaseModel):
     algorithm: str = "q_learning"
@@ -54,11 +158,28 @@ class TrainRequest(BaseModel):
     epsilon: float = 0.15
     max_steps: int = 200
     mc_method: str = "first_visit"
+    mc_returns: str = "incremental"
+    mc_step_size: Optional[float] = None
     epsilon_decay: float = 0.9996
     min_epsilon: float = 0.01
     maze: Optional[List[int]] = None
     rows: Optional[int] = None
     cols: Optional[int] = None
+    q_stats_every: int = 1
+    seed: Optional[int] = None
+    engine: str = "auto"
+    distance_mode: str = "manhattan"
+    use_cache: bool = True
+    warm_start_job_id: Optional[str] = None
+    initial_q_table: Optional[List[List[float]]] = None
+    seeds: int = 1
+    early_stopping: bool = False
+    stop_check_every: int = 200
+    stop_patience: int = 3
+    stop_success_rate: Optional[float] = 0.9
+    stop_q_tol: Optional[float] = None
+    stop_greedy_solved: Optional[float] = None
+    eval_every: int = 250
 
 @app.get("/", response_class=HTMLResponse)
 def index():
@@ -71,16 +192,89 @@ def favicon():
         return FileResponse(path)
     return "", 204
 
+def _check_maze(req):
+    """400 unless the request's maze is well formed and within MAX_MAZE_CELLS"""
+    if not req.maze:
+        return  # the default maze
+    if not req.rows or not req.cols or req.rows < 2 or req.cols < 2:
+        raise HTTPException(status_code=400, detail="A custom maze needs rows and cols of at least 2")
+    if req.rows * req.cols > MAX_MAZE_CELLS:
+        raise HTTPException(status_code=400, detail=f"Mazes are limited to {MAX_MAZE_CELLS} cells")
+    if len(req.maze) != req.rows * req.cols:
+        raise HTTPException(status_code=400, detail=f"maze has {len(req.maze)} cells, rows x cols is {req.rows * req.cols}")
+    if min(req.maze) < 0 or max(req.maze) > 3:
+        raise HTTPException(status_code=400, detail="Maze cells must be 0 (wall), 1 (path), 2 (start) or 3 (goal)")
+
+def _check_params(req):
+    """400 for training parameters a worker would only reject after the job is queued"""
+    if req.algorithm in PLANNERS and not 0 <= req.gamma < 1:
+        raise HTTPException(status_code=400, detail="value_iteration and policy_iteration need 0 <= gamma < 1")
+    if req.episodes < 1 or req.seeds < 1:
+        raise HTTPException(status_code=400, detail="episodes and seeds must be at least 1")
+    if req.q_stats_every < 1:
+        raise HTTPException(status_code=400, detail="q_stats_every must be at least 1")
+    if req.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {', '.join(ENGINES)}")
+    if req.mc_method not in MC_METHODS:
+        raise HTTPException(status_code=400, detail=f"mc_method must be one of {', '.join(MC_METHODS)}")
+    if req.mc_returns not in MC_RETURNS_MODES:
+        raise HTTPException(status_code=400, detail=f"mc_returns must be one of {', '.join(MC_RETURNS_MODES)}")
+    if req.mc_step_size is not None and req.mc_step_size <= 0:
+        raise HTTPException(status_code=400, detail="mc_step_size must be positive")
+    if req.early_stopping:
+        # A stable greedy policy alone is not convergence; one of these must gate the stop
+        if req.stop_success_rate is None and req.stop_q_tol is None and req.stop_greedy_solved is None:
+            raise HTTPException(status_code=400, detail="early_stopping needs stop_success_rate, stop_q_tol or stop_greedy_solved")
+        if req.stop_patience < 1 or req.stop_check_every < 1:
+            raise HTTPException(status_code=400, detail="stop_patience and stop_check_every must be at least 1")
+    if req.max_steps < 1:
+        raise HTTPException(status_code=400, detail="max_steps must be at least 1")
+    for name in ('alpha', 'gamma', 'epsilon', 'epsilon_decay', 'min_epsilon'):
+        if not 0 <= getattr(req, name) <= 1:
+            raise HTTPException(status_code=400, detail=f"{name} must be between 0 and 1")
+
+@app.get('/maze/generate')
+def generate(rows: int = 16, cols: int = 17, seed: Optional[int] = None, loops: float = 0.0):
+    """A procedurally generated maze, ready to send to /train.
+    
+    loops is the fraction of removable interior walls knocked out to add
+    cycles to the otherwise perfect maze (see envs/maze_generator.py).
+    """
+    if rows < 3 or cols < 3 or rows * cols > MAX_MAZE_CELLS:
+        raise HTTPException(status_code=400, detail=f"rows and cols must be at least 3 and at most {MAX_MAZE_CELLS} cells in total")
+    if not 0 <= loops <= 1:
+        raise HTTPException(status_code=400, detail="loops must be between 0 and 1")
+    return {'maze': generate_maze(rows, cols, seed, loops).tolist(), 'rows': rows, 'cols': cols}
+
 @app.post('/train')
 def start_train(req: TrainRequest):
-    """Start a new training job in background thread"""
+    """Queue a new training job on the worker pool, or answer it from the result cache"""
+    return _queue_job(req)
+
+def _queue_job(req, env=None):
+    """Create the job record and submit it; env is an optional prebuilt MazeEnv"""
+    _check_maze(req)
+    _check_params(req)
     job_id = str(uuid.uuid4())
+    params = req.model_dump()
+    # Without a seed every run differs, so there is nothing to reuse
+    key = cache_key(params) if req.seed is not None else None
+    if req.maze is not None:
+        params['maze'] = np.asarray(req.maze, dtype=np.uint8)  # 1 byte per cell on the way to the worker
     
-    logger.info("="*60)
-    logger.info(f"🚀 Training Started: {req.algorithm}")
-    logger.info(f"Job ID: {job_id[:8]}...")
-    logger.info(f"Episodes: {req.episodes}")
-    logger.info("="*60)
+    if req.warm_start_job_id:
+        source = JOBS.get(req.warm_start_job_id)
+        if not source or source.get('q_table') is None:
+            raise HTTPException(status_code=404, detail="Warm-start job not found or not finished")
+        params['warm_start'] = {'q_table': source['q_table'], 'rows': source.get('rows'), 'cols': source.get('cols')}
+    elif req.initial_q_table is not None:
+        params['warm_start'] = {'q_table': req.initial_q_table}
+    
+    cached = RESULT_CACHE.get(key) if req.use_cache and key else None
+    if cached is not None:
+        JOBS[job_id] = {'episodes': req.episodes, **cached, 'cached': True, 'cache_key': key, 'revision': 0}
+        logger.info(f"♻️ Cache hit for {req.algorithm} - Job ID: {job_id[:8]}...")
+        return {"job_id": job_id, "cached": True}
     
     JOBS[job_id] = {
         'status': 'queued',
@@ -96,170 +290,520 @@ def start_train(req: TrainRequest):
         'q_value_history': None,
         'episode_returns_history': None,
         'episode_lengths_history': None,
-        'loss_history': None
+        'loss_history': None,
+        'cached': False,
+        'cache_key': key,
+        'revision': 0,
     }
+    params['checkpoint_path'] = JOBS.checkpoint_path(job_id)
+    JOBS.save_params(job_id, params)
+    
+    try:
+        _submit_job(job_id, params, env)
+    except QueueFullError as e:
+        del JOBS[job_id]
+        logger.warning(f"Rejected training request: {e}")
+        raise HTTPException(status_code=429, detail="Training queue is full, try again later")
+    
+    logger.info("="*60)
+    logger.info(f"🚀 Training Queued: {req.algorithm}")
+    logger.info(f"Job ID: {job_id[:8]}...")
+    logger.info(f"Episodes: {req.episodes}")
+    logger.info(f"Pending jobs: {SCHEDULER.pending}/{SCHEDULER.max_workers} workers")
+    logger.info("="*60)
+    return {"job_id": job_id, "cached": False}
 
-    def _train():
-        """Background training function"""
-        JOBS[job_id]['status'] = 'running'
-        
+def _submit_job(job_id, params, env=None):
+    """Start a job on the pool; multi-seed jobs get a coordinator thread that fans out the seeds"""
+    if params.get('seeds', 1) <= 1:
+        SCHEDULER.submit(job_id, run_training, params, env)
+        return
+    if SCHEDULER.free_slots < 1:
+        raise QueueFullError(f"{SCHEDULER.pending} training jobs already pending")
+    threading.Thread(target=_run_seeds, args=(job_id, params, env), daemon=True).start()
+
+def _resume_jobs(backlog):
+    """Resubmit persisted jobs in order as pool slots free up (runs in a background thread)"""
+    while backlog and not SCHEDULER.closed:
+        job_id, params = backlog[0]
         try:
-            use_shaping = req.algorithm == "monte_carlo"
-            
-            if req.maze and req.rows and req.cols:
-                env = MazeEnv(grid_flat=req.maze, rows=req.rows, cols=req.cols, use_distance_shaping=use_shaping)
-            else:
-                env = MazeEnv(use_distance_shaping=use_shaping)
-        except Exception as e:
-            logger.error(f"Environment creation failed: {str(e)}")
-            JOBS[job_id]['status'] = 'error'
-            return
-
-        if req.algorithm == "q_learning":
-            agent = QLearningAgent(env.n_states, env.n_actions, alpha=req.alpha, gamma=req.gamma, epsilon=req.epsilon)
-        elif req.algorithm == "monte_carlo":
-            optimistic_init = 100.0
-            mc_epsilon = max(req.epsilon, 0.2)
-            agent = MonteCarloAgent(env.n_states, env.n_actions, gamma=req.gamma, epsilon=mc_epsilon, method=req.mc_method, optimistic_init=optimistic_init)
-        elif req.algorithm == "sarsa":
-            agent = SarsaAgent(env.n_states, env.n_actions, alpha=req.alpha, gamma=req.gamma, epsilon=req.epsilon)
+            _submit_job(job_id, params)
+        except QueueFullError:
+            time.sleep(0.5)  # more unfinished jobs than MAZE_TRAIN_QUEUE admits
+            continue
+        except Exception:
+            logger.exception(f"Could not resume job {job_id[:8]}")
         else:
-            logger.error(f"Unknown algorithm: {req.algorithm}")
-            JOBS[job_id]['status'] = 'error'
-            return
-        
-        start_time = time.time()
-        success_count = 0
-        rewards_window = []
-        
-        for ep in range(req.episodes):
-            current_epsilon = req.epsilon
-            if req.algorithm.startswith("monte_carlo"):
-                mc_initial = max(req.epsilon, 0.2)
-                mc_min = max(req.min_epsilon, 0.05)
-                current_epsilon = max(mc_min, mc_initial * (req.epsilon_decay ** ep))
-                agent.epsilon = current_epsilon
-            
-            exploring_start = req.algorithm == "monte_carlo"
-            total_reward, success = agent.run_episode(env, max_steps=req.max_steps, epsilon=current_epsilon, exploring_start=exploring_start)
-            rewards_window.append(total_reward)
-            if success:
-                success_count += 1
-            
-            if (ep + 1) % max(1, req.episodes // 100) == 0 or ep == req.episodes - 1:
-                JOBS[job_id]['episode'] = ep + 1
-                JOBS[job_id]['progress'] = int(((ep + 1) / req.episodes) * 100)
-                avg_reward = float(sum(rewards_window[-100:]) / min(len(rewards_window), 100))
-                success_rate = float(success_count / (ep + 1))
-                JOBS[job_id]['avg_reward'] = avg_reward
-                JOBS[job_id]['success_rate'] = success_rate
-                JOBS[job_id]['logs'] = rewards_window[-200:]
-                logger.info(f"Episode {ep + 1}/{req.episodes} - Reward: {avg_reward:.2f} - Success: {success_rate*100:.1f}%")
-            time.sleep(0)
-        
-        training_duration = time.time() - start_time
-        
-        JOBS[job_id]['status'] = 'finished'
-        JOBS[job_id]['policy'] = agent.get_policy(env)
-        JOBS[job_id]['q_table'] = agent.Q.tolist()
-        
-        metrics_summary = agent.get_metrics_summary(last_n=100)
-        metrics_summary['training_duration'] = training_duration
-        metrics_summary['episodes_per_sec'] = req.episodes / training_duration
-        
-        JOBS[job_id]['detailed_metrics'] = metrics_summary
-        JOBS[job_id]['q_value_history'] = agent.q_value_history
-        JOBS[job_id]['episode_returns_history'] = agent.episode_returns
-        JOBS[job_id]['episode_lengths_history'] = agent.episode_lengths
-        JOBS[job_id]['loss_history'] = agent.loss_history
-        
-        final_success_rate = JOBS[job_id]['success_rate'] * 100 if JOBS[job_id]['success_rate'] else 0
-        
-        logger.info("="*60)
-        logger.info(f"✅ Training Complete - Success Rate: {final_success_rate:.1f}%")
-        logger.info(f"Time: {training_duration:.2f}s - Speed: {req.episodes/training_duration:.1f} eps/sec")
-        logger.info("="*60)
+            logger.info(f"♻️ Resuming job {job_id[:8]}...")
+        backlog.pop(0)
+
+def _run_seeds(job_id, params, env):
+    """Train every seed of a multi-seed job as its own pool job and merge the results.
+    
+    Runs in a background thread. At most one seed per worker waits in the
+    pool at a time, so a large K does not fill the queue for other jobs.
+    """
+    seeds = params['seeds']
+    start_time = time.time()
+    try:
+        if env is None:
+            env = build_env(params)  # built once here instead of once per seed
+        waiting = list(range(seeds))
+        pending = {}
+        runs = {}
+        while waiting or pending:
+            if SCHEDULER.closed:
+                _apply_result(job_id, None, 'cancelled')
+                return
+            while waiting and len(pending) < SCHEDULER.max_workers:
+                try:
+                    future = SCHEDULER.submit(f"{job_id}:{waiting[0]}", run_training, seed_params(params, waiting[0]), env)
+                except QueueFullError:
+                    break
+                pending[future] = waiting.pop(0)
+                if len(waiting) == seeds - 1:
+                    _apply_progress(job_id, {'status': 'running'})
+            if not pending:
+                time.sleep(0.5)  # the pool is full of other jobs
+                continue
+            done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                k = pending.pop(future)
+                if future.cancelled() or SCHEDULER.closed:
+                    _apply_result(job_id, None, 'cancelled')
+                    return
+                if future.exception() is not None:
+                    _apply_result(job_id, None, future.exception())
+                    return
+                runs[k] = future.result()
+                _apply_progress(job_id, seed_progress(list(runs.values()), seeds))
+                logger.info(f"Seed {len(runs)}/{seeds} of job {job_id[:8]} - Success: {runs[k]['success_rate']*100:.1f}%")
+        _apply_result(job_id, combine_seeds([runs[k] for k in range(seeds)], params, time.time() - start_time), None)
+    except Exception as e:
+        logger.exception(f"Multi-seed job {job_id[:8]} failed")
+        _apply_result(job_id, None, e)
 
-    thread = threading.Thread(target=_train, daemon=True)
-    thread.start()
-    return {"job_id": job_id}
+def _job_response(request, job, variant, build):
+    """JSON from build() tagged with the job's revision; 304 if the client's ETag is current.
+    
+    variant distinguishes differently shaped responses for the same job.
+    """
+    etag = f'W/"{job.get("revision", 0)}-{zlib.crc32(variant.encode()):08x}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in (tag.strip() for tag in request.headers.get('if-none-match', '').split(',')):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(), headers=headers)
 
 @app.get('/status/{job_id}')
-def get_status(job_id: str):
-    """Check training progress"""
+def get_status(job_id: str, request: Request, fields: Optional[str] = None):
+    """Check training progress.
+    
+    Returns STATUS_FIELDS by default; fields= takes a comma-separated list
+    of job keys, or "all" for the whole record.
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        return {'error': 'job not found'}
+    if fields == 'all':
+        selected = list(job)
+    elif fields:
+        selected = [key.strip() for key in fields.split(',') if key.strip() in job]
+    else:
+        selected = STATUS_FIELDS
+    json_fields = {'policy': _json_policy, 'q_table': _json_q_table}
+    return _job_response(request, job, f"status:{fields}", lambda: {
+        key: json_fields[key](job[key]) if key in json_fields else job.get(key) for key in selected
+    })
+
+def _sse(event):
+    return f"data: {json.dumps(event)}\n\n"
+
+@app.get('/events/{job_id}')
+async def stream_job_events(job_id: str):
+    """Server-sent events: a snapshot, then progress deltas, then the final policy once"""
+    job = JOBS.get(job_id)
+    if not job:
+        return {'error': 'job not found'}
+    queue = EVENTS.subscribe(job_id)
+    
+    async def event_stream():
+        try:
+            if job['status'] == 'finished':
+                yield _sse(_final_event(job))
+                return
+            yield _sse({'type': 'snapshot', **{key: job[key] for key in PROGRESS_FIELDS}, 'rewards': job['logs']})
+            if job['status'] == 'error':
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if job_id not in JOBS:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event)
+                if event['type'] in ('finished', 'error'):
+                    return
+        finally:
+            EVENTS.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(event_stream(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+# Registered before /policy/{job_id}, which would otherwise match "<id>.bin"
+@app.get('/policy/{job_id}.bin')
+def get_policy_binary(job_id: str, dtype: str = "float32", layout: str = "auto"):
+    """Q-table and policy as a raw little-endian buffer (layout in training/encoding.py).
+    
+    layout=auto sends the sparse variant, which skips walls and the goal,
+    for mazes above encoding.SPARSE_MIN_STATES states.
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        return {'error': 'job not found'}
+    if job.get('q_table') is None:
+        return {'error': 'job not finished'}
+    if dtype not in DTYPES:
+        return {'error': f"dtype must be one of {', '.join(DTYPES)}"}
+    if layout not in LAYOUTS:
+        return {'error': f"layout must be one of {', '.join(LAYOUTS)}"}
+    data = encode_binary(job['q_table'], job['policy'], job.get('rows'), job.get('cols'), dtype, layout)
+    return Response(content=data, media_type='application/octet-stream')
+
+@app.get('/policy/{job_id}.npz')
+def get_policy_npz(job_id: str):
+    """Q-table and policy as a compressed NumPy archive"""
     job = JOBS.get(job_id)
     if not job:
         return {'error': 'job not found'}
-    return job
+    if job.get('q_table') is None:
+        return {'error': 'job not finished'}
+    data = encode_npz(job['q_table'], job['policy'], job.get('rows'), job.get('cols'))
+    return Response(content=data, media_type='application/octet-stream',
+                    headers={'Content-Disposition': f'attachment; filename="{job_id}.npz"'})
 
 @app.get('/policy/{job_id}')
-def get_policy(job_id: str):
-    """Get learned policy and Q-table"""
+def get_policy(job_id: str, request: Request):
+    """Get learned policy and Q-table; both are null above JSON_STATE_LIMIT states, use the .bin download"""
     job = JOBS.get(job_id)
     if not job:
         return {'error': 'job not found'}
-    return {
-        'policy': job.get('policy'),
-        'q_table': job.get('q_table'),
+    return _job_response(request, job, 'policy', lambda: {
+        'policy': _json_policy(job.get('policy')),
+        'q_table': _json_q_table(job.get('q_table')),
         'status': job.get('status')
-    }
+    })
+
+HISTORY_FIELDS = ('episode_returns_history', 'episode_lengths_history', 'loss_history')
+
+def _history_view(values, offset, limit, points, method):
+    """Slice a stored history and optionally downsample it; returns (values, indices)"""
+    window = values[offset:] if limit is None else values[offset:offset + limit]
+    indices = range(offset, offset + len(window))
+    if points is not None and len(window) > points:
+        kept, sampled = downsample(window, points, method)
+        return sampled.tolist(), (kept + offset).tolist()
+    return list(window), list(indices)
 
 @app.get('/metrics/{job_id}')
-def get_detailed_metrics(job_id: str):
-    """Get detailed performance statistics"""
+def get_detailed_metrics(job_id: str, request: Request, points: Optional[int] = None, method: str = "lttb",
+                         offset: int = 0, limit: Optional[int] = None):
+    """Get detailed performance statistics.
+    
+    Histories can be paged with offset/limit (in stored points) and reduced
+    to at most `points` values with LTTB or min/max bucketing. When
+    downsampled, history_indices gives the stored-point index of every
+    returned value; multiply by history_stride for the episode number.
+    """
     job = JOBS.get(job_id)
     if not job:
         return {'error': 'job not found'}
+    if points is not None and points < 2:
+        return {'error': 'points must be at least 2'}
+    if method not in DOWNSAMPLE_METHODS:
+        return {'error': f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}"}
+    if offset < 0 or (limit is not None and limit < 0):
+        return {'error': 'offset and limit must not be negative'}
     
-    return {
-        'status': job.get('status'),
-        'detailed_metrics': job.get('detailed_metrics'),
-        'q_value_history': job.get('q_value_history'),
-        'episode_returns_history': job.get('episode_returns_history'),
-        'episode_lengths_history': job.get('episode_lengths_history'),
-        'loss_history': job.get('loss_history'),
-        'success_rate': job.get('success_rate'),
-        'avg_reward': job.get('avg_reward')
-    }
+    def build():
+        histories, indices, totals = {}, {}, {}
+        for field in HISTORY_FIELDS:
+            if job.get(field) is None:
+                histories[field] = indices[field] = totals[field] = None
+                continue
+            histories[field], indices[field] = _history_view(job[field], offset, limit, points, method)
+            totals[field] = len(job[field])
+        q_history = job.get('q_value_history')
+        if q_history is not None:
+            views = {stat: _history_view(values, offset, limit, points, method) for stat, values in q_history.items()}
+            histories['q_value_history'] = {stat: view[0] for stat, view in views.items()}
+            indices['q_value_history'] = {stat: view[1] for stat, view in views.items()}
+            totals['q_value_history'] = {stat: len(values) for stat, values in q_history.items()}
+        else:
+            histories['q_value_history'] = indices['q_value_history'] = totals['q_value_history'] = None
+        return {
+            'status': job.get('status'),
+            'detailed_metrics': job.get('detailed_metrics'),
+            **histories,
+            'history_indices': indices if points is not None else None,
+            'history_totals': totals,
+            'history_stride': job.get('history_stride', 1),
+            'success_rate': job.get('success_rate'),
+            'avg_reward': job.get('avg_reward')
+        }
+    
+    return _job_response(request, job, f"metrics:{points}:{method}:{offset}:{limit}", build)
+
+COMPARISON_METRICS = ('avg_return', 'avg_episode_length', 'training_duration', 'return_gap')
 
 @app.post('/compare')
 def compare_algorithms(req: TrainRequest):
-    """Train all three algorithms on the same maze"""
+    """Train all three algorithms on the same maze in parallel.
+    
+    Each distinct environment (the TD agents share one; Monte Carlo uses
+    distance shaping) is built once here and shipped to the workers. With
+    seeds > 1 every algorithm's seeds are spread over the pool and the
+    comparison reports means with confidence intervals. Poll
+    /compare/{comparison_id} for aggregated progress.
+    """
     algorithms = ["q_learning", "monte_carlo", "sarsa"]
-    job_ids = {}
+    _check_maze(req)
+    _check_params(req)
+    if SCHEDULER.free_slots < len(algorithms):
+        raise HTTPException(status_code=429, detail="Training queue is full, try again later")
     
     logger.info(f"🔬 Comparing {len(algorithms)} algorithms")
     
+    envs = {}
+    job_ids = {}
     for algorithm in algorithms:
-        comparison_req = TrainRequest(
-            algorithm=algorithm,
-            episodes=req.episodes,
-            alpha=req.alpha,
-            gamma=req.gamma,
-            epsilon=req.epsilon,
-            max_steps=req.max_steps,
-            mc_method=req.mc_method,
-            epsilon_decay=req.epsilon_decay,
-            min_epsilon=req.min_epsilon,
-            maze=req.maze,
-            rows=req.rows,
-            cols=req.cols
-        )
+        comparison_req = req.model_copy(update={'algorithm': algorithm})
+        params = comparison_req.model_dump()
+        if uses_shaping(params) not in envs:
+            try:
+                envs[uses_shaping(params)] = build_env(params)
+            except (ValueError, AssertionError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid maze: {e}")
         
-        result = start_train(comparison_req)
+        result = _queue_job(comparison_req, envs[uses_shaping(params)])
         job_ids[algorithm] = result["job_id"]
     
+    comparison_id = str(uuid.uuid4())
+    COMPARISONS[comparison_id] = {'algorithms': algorithms, 'job_ids': job_ids}
     return {
-        "comparison_id": str(uuid.uuid4()),
+        "comparison_id": comparison_id,
         "algorithms": algorithms,
         "job_ids": job_ids,
         "status": "comparison_started"
     }
 
+@app.get('/compare/{comparison_id}')
+def get_comparison(comparison_id: str):
+    """Aggregated progress of a comparison, with a summary per algorithm once finished"""
+    comparison = COMPARISONS.get(comparison_id)
+    if not comparison:
+        return {'error': 'comparison not found'}
+    
+    members = {}
+    for algorithm, job_id in comparison['job_ids'].items():
+        job = JOBS.get(job_id)
+        if not job:
+            members[algorithm] = {'job_id': job_id, 'status': 'error', 'progress': 0}
+            continue
+        members[algorithm] = {'job_id': job_id, **{key: job.get(key) for key in PROGRESS_FIELDS}}
+        if job['status'] == 'finished' and job.get('detailed_metrics'):
+            members[algorithm]['summary'] = {key: job['detailed_metrics'].get(key) for key in COMPARISON_METRICS}
+            if job.get('seed_stats'):
+                members[algorithm]['seed_stats'] = job['seed_stats']
+    
+    statuses = [member['status'] for member in members.values()]
+    if 'error' in statuses:
+        status = 'error'
+    elif all(s == 'finished' for s in statuses):
+        status = 'finished'
+    elif 'running' in statuses or 'finished' in statuses:
+        status = 'running'
+    else:
+        status = 'queued'
+    response = {
+        'comparison_id': comparison_id,
+        'status': status,
+        'progress': int(sum(member['progress'] or 0 for member in members.values()) / len(members)),
+        'algorithms': comparison['algorithms'],
+        'members': members,
+    }
+    if status == 'finished' and all('seed_stats' in member for member in members.values()):
+        # Best mean success rate first; overlapping intervals mean the ranking is not conclusive
+        response['ranking'] = sorted(
+            members,
+            key=lambda algorithm: members[algorithm]['seed_stats']['success_rate']['mean'] or 0,
+            reverse=True,
+        )
+    return response
+
+MAX_SWEEP_TRIALS = 243
+
+class SweepRequest(BaseModel):
+    base: TrainRequest = TrainRequest()
+    space: Dict[str, Any]
+    mode: str = "grid"
+    n_trials: int = 20
+    eta: int = 3
+    min_episodes: Optional[int] = None
+    metric: str = "avg_return"
+    seed: Optional[int] = None
+
+def _sweep_runs(n_trials, rungs, eta):
+    """Total trial segments a sweep will train, for its progress percentage"""
+    total, active = 0, n_trials
+    for rung in range(rungs):
+        total += active
+        if rung + 1 < rungs:
+            active = max(1, active // eta)
+    return total
+
+def _run_sweep(sweep_id, halving, base_params, env):
+    """Drive a sweep rung by rung on the training pool (runs in a background thread).
+
+    Trials are submitted as pool slots free up. A surviving trial continues
+    from its own Q-table, so each rung only trains the episodes between its
+    budget and the previous one.
+    """
+    sweep = SWEEPS[sweep_id]
+    try:
+        while not halving.finished:
+            sweep['rung'] = halving.rung
+            waiting = list(halving.active)
+            pending = {}
+            while waiting or pending:
+                while waiting and SCHEDULER.free_slots > 0:
+                    trial = waiting.pop(0)
+                    params = {**base_params, **trial['config'], 'episodes': halving.episodes_to_run(trial)}
+                    if trial['result'] is not None:
+                        result = trial['result']
+                        params['warm_start'] = {'q_table': result['q_table'], 'rows': result['rows'], 'cols': result['cols']}
+                    try:
+                        future = SCHEDULER.submit(f"{sweep_id}:{trial['trial']}:{halving.rung}", run_training, params, env)
+                    except QueueFullError:
+                        waiting.insert(0, trial)
+                        break
+                    pending[future] = trial
+                if not pending:
+                    time.sleep(0.5)  # the pool is full of other jobs
+                    continue
+                done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial = pending.pop(future)
+                    failed = future.cancelled() or future.exception() is not None
+                    halving.record(trial, None if failed else future.result())
+                    sweep['completed'] += 1
+            halving.promote()
+
+        best = halving.best()
+        if best['result'] is not None:
+            best_job_id = str(uuid.uuid4())
+            JOBS[best_job_id] = {
+                **best['result'],
+                'episodes': halving.budgets[-1],
+                'episode': halving.budgets[-1],
+                'cached': False,
+                'revision': 0,
+                'sweep_id': sweep_id,
+            }
+            sweep['best_job_id'] = best_job_id
+        sweep['best_config'] = best['config']
+        sweep['status'] = 'finished'
+        logger.info(f"🏁 Sweep {sweep_id[:8]} finished - best config: {best['config']}")
+    except Exception:
+        logger.exception(f"Sweep {sweep_id[:8]} failed")
+        sweep['status'] = 'error'
+
+@app.post('/sweep')
+def start_sweep(req: SweepRequest):
+    """Search hyperparameters with successive halving.
+
+    space maps parameters to lists of values (grid mode) or, in random
+    mode, optionally to {"min", "max", "log"} ranges. Every configuration
+    starts with a small share of base.episodes; after each rung only the
+    best 1/eta continue, until the survivors reach the full budget. Poll
+    /sweep/{sweep_id} for the leaderboard; the winner is stored as a normal
+    job under best_job_id.
+    """
+    _check_maze(req.base)
+    _check_params(req.base)
+    if req.base.algorithm not in ('q_learning', 'sarsa', 'monte_carlo'):
+        raise HTTPException(status_code=400, detail="Sweeps support q_learning, sarsa and monte_carlo")
+    if req.metric not in SWEEP_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(SWEEP_METRICS)}")
+    if req.eta < 2:
+        raise HTTPException(status_code=400, detail="eta must be at least 2")
+    try:
+        configs = sample_configs(req.space, req.mode, req.n_trials, req.seed)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search space: {e}")
+    if not 1 <= len(configs) <= MAX_SWEEP_TRIALS:
+        raise HTTPException(status_code=400, detail=f"A sweep needs between 1 and {MAX_SWEEP_TRIALS} configurations")
+    base_fields = req.base.model_dump(exclude={'maze', 'initial_q_table'})  # _check_params never reads these
+    for config in configs:
+        try:
+            _check_params(TrainRequest(**{**base_fields, **config}))
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid configuration {config}: {e.errors()[0]['msg']}")
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Invalid configuration {config}: {e.detail}")
+
+    base_params = req.base.model_dump()
+    # Trials report under IDs with no job record, so mid-run greedy evaluations would be discarded
+    base_params.update({'seeds': 1, 'checkpoint_path': None, 'eval_every': 0})
+    if req.base.maze is not None:
+        base_params['maze'] = np.asarray(req.base.maze, dtype=np.uint8)
+    try:
+        env = build_env(base_params)
+    except (ValueError, AssertionError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid maze: {e}")
+
+    budgets = rung_budgets(req.base.episodes, len(configs), req.eta, req.min_episodes)
+    halving = SuccessiveHalving(configs, budgets, req.eta, req.metric)
+    sweep_id = str(uuid.uuid4())
+    SWEEPS[sweep_id] = {
+        'status': 'running',
+        'halving': halving,
+        'rung': 0,
+        'completed': 0,
+        'total_runs': _sweep_runs(len(configs), len(budgets), req.eta),
+        'best_job_id': None,
+        'best_config': None,
+    }
+    threading.Thread(target=_run_sweep, args=(sweep_id, halving, base_params, env), daemon=True).start()
+
+    logger.info(f"🔎 Sweep {sweep_id[:8]}: {len(configs)} configurations, budgets {budgets}")
+    return {'sweep_id': sweep_id, 'n_trials': len(configs), 'budgets': budgets, 'status': 'sweep_started'}
+
+@app.get('/sweep/{sweep_id}')
+def get_sweep(sweep_id: str):
+    """Progress and leaderboard of a sweep"""
+    sweep = SWEEPS.get(sweep_id)
+    if not sweep:
+        return {'error': 'sweep not found'}
+    halving = sweep['halving']
+    return {
+        'sweep_id': sweep_id,
+        'status': sweep['status'],
+        'progress': int(sweep['completed'] / sweep['total_runs'] * 100),
+        'rung': sweep['rung'],
+        'budgets': halving.budgets,
+        'metric': halving.metric,
+        'leaderboard': halving.leaderboard(),
+        'best_config': sweep['best_config'],
+        'best_job_id': sweep['best_job_id'],
+    }
+
 @app.post('/reset')
 def reset_environment():
     """Clear all training jobs"""
     job_count = len(JOBS)
     JOBS.clear()
+    COMPARISONS.clear()
+    SWEEPS.clear()
     logger.info(f"🔄 Reset - Cleared {job_count} jobs")
     return {'status': 'reset', 'message': 'All training jobs cleared'}
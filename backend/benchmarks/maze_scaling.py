@@ -0,0 +1,91 @@
+"""Training throughput and memory against maze size.
+
+Run from backend/:
+
+    python -m benchmarks.maze_scaling [--episodes 200] [--max-steps 1000] [--engine auto]
+
+Every size is measured in a fresh process so peak RSS belongs to that size
+alone. 16x17 is the default maze; larger sizes are generated with
+envs.maze_generator. For each size the table reports the environment build
+time, training episodes/sec (Q-learning through run_training, after a
+warm-up run so JIT compilation is excluded), the wall time of the whole run
+including the final greedy evaluation and optimal baseline, the peak RSS
+above the process's footprint after imports, and the size of the .bin
+download in the dense and sparse layouts.
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+SIZES = ((16, 17), (64, 64), (256, 256), (1000, 1000))
+
+def _peak_rss():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+def measure(rows, cols, episodes, max_steps, engine, seed):
+    """One size, run inside its own worker process"""
+    from envs.maze_env import MazeEnv
+    from envs.maze_generator import generate_maze
+    from training.encoding import encode_binary
+    from training.runner import run_training
+    
+    params = {
+        'algorithm': 'q_learning', 'episodes': episodes, 'alpha': 0.3, 'gamma': 0.99,
+        'epsilon': 0.15, 'epsilon_decay': 0.995, 'min_epsilon': 0.01, 'max_steps': max_steps,
+        'mc_method': 'first_visit', 'seed': seed, 'engine': engine, 'eval_every': 0,
+        'rows': rows, 'cols': cols,
+    }
+    run_training(None, {**params, 'episodes': 2, 'rows': 16, 'cols': 17}, MazeEnv())  # compile the kernels
+    baseline = _peak_rss()
+    
+    start = time.perf_counter()
+    if (rows, cols) == (16, 17):
+        env = MazeEnv()
+    else:
+        env = MazeEnv(grid_flat=generate_maze(rows, cols, seed=seed), rows=rows, cols=cols)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = run_training(None, params, env)
+    total_time = time.perf_counter() - start
+
+    dense = encode_binary(result['q_table'], result['policy'], rows, cols, layout='dense')
+    sparse = encode_binary(result['q_table'], result['policy'], rows, cols, layout='sparse')
+    rss = _peak_rss() - baseline
+    return {
+        'size': f"{rows}x{cols}",
+        'open': len(env.open_states),
+        'build_s': build_time,
+        'eps_per_s': result['detailed_metrics']['episodes_per_sec'],
+        'total_s': total_time,
+        'rss_mb': rss / 2**20,
+        'dense_mb': len(dense) / 2**20,
+        'sparse_mb': len(sparse) / 2**20,
+    }
+
+def _measure(args):
+    return measure(*args)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--max-steps', type=int, default=1000)
+    parser.add_argument('--engine', default='auto', choices=('auto', 'numba', 'python'))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    columns = ('size', 'open', 'build_s', 'eps_per_s', 'total_s', 'rss_mb', 'dense_mb', 'sparse_mb')
+    print(' '.join(f"{name:>10}" for name in columns))
+    context = multiprocessing.get_context('spawn')
+    for rows, cols in SIZES:
+        with context.Pool(1) as pool:
+            row = pool.apply(_measure, ((rows, cols, args.episodes, args.max_steps, args.engine, args.seed),))
+        print(' '.join(
+            f"{row[name]:>10.2f}" if isinstance(row[name], float) else f"{row[name]:>10}"
+            for name in columns
+        ), flush=True)
+
+if __name__ == '__main__':
+    main()
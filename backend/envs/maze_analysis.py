@@ -0,0 +1,180 @@
+"""Shortest-path queries on maze grids.
+
+distance_field runs one breadth-first search from the goal (compiled with
+numba when it is installed, otherwise vectorized one frontier at a time)
+and caches the result keyed by a hash of the grid, so every env built on
+the same maze shares it. shortest_path answers single start/goal queries with
+A* and a Manhattan heuristic. evaluate_policy follows a deterministic
+policy from every open cell at once and compares it with distance_field.
+"""
+import hashlib
+import heapq
+from collections import OrderedDict
+import numpy as np
+from agents.kernels import NUMBA_AVAILABLE, njit
+
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1))  # up, down, left, right, as in MazeEnv
+
+_distance_cache = OrderedDict()
+_CACHE_SIZE = 64
+
+def grid_key(grid, rows, cols):
+    """Stable hash of a flat grid and its shape"""
+    digest = hashlib.sha1(np.ascontiguousarray(grid, dtype=np.int8).tobytes())
+    digest.update(f"{rows}x{cols}".encode())
+    return digest.hexdigest()
+
+def distance_field(grid, rows, cols, goal=None):
+    """BFS step count from every cell to the goal; -1 for walls and unreachable cells.
+    
+    The returned array is shared through the cache and must not be modified.
+    """
+    grid = np.asarray(grid)
+    if goal is None:
+        goal = int(np.flatnonzero(grid == 3)[0])
+    key = (grid_key(grid, rows, cols), goal)
+    if key in _distance_cache:
+        _distance_cache.move_to_end(key)
+        return _distance_cache[key]
+    
+    open_cells = grid != 0
+    distances = np.full(rows * cols, -1, dtype=np.int64)
+    distances[goal] = 0
+    if NUMBA_AVAILABLE:
+        _bfs_kernel(open_cells, rows, cols, goal, distances)
+    else:
+        _bfs_frontiers(open_cells, rows, cols, goal, distances)
+    
+    distances.setflags(write=False)
+    _distance_cache[key] = distances
+    if len(_distance_cache) > _CACHE_SIZE:
+        _distance_cache.popitem(last=False)
+    return distances
+
+def _bfs_frontiers(open_cells, rows, cols, goal, distances):
+    """BFS with one vectorized step per depth; slow on long corridors, where frontiers stay tiny"""
+    frontier = np.array([goal])
+    depth = 0
+    while len(frontier):
+        depth += 1
+        r, c = frontier // cols, frontier % cols
+        neighbours = []
+        for dr, dc in MOVES:
+            nr, nc = r + dr, c + dc
+            inside = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+            neighbours.append(nr[inside] * cols + nc[inside])
+        candidates = np.unique(np.concatenate(neighbours))
+        frontier = candidates[open_cells[candidates] & (distances[candidates] < 0)]
+        distances[frontier] = depth
+
+@njit(cache=True)
+def _bfs_kernel(open_cells, rows, cols, goal, distances):
+    """Queue-based BFS filling distances in place; linear in the number of cells"""
+    queue = np.empty(rows * cols, dtype=np.int64)
+    queue[0] = goal
+    head, tail = 0, 1
+    while head < tail:
+        state = queue[head]
+        head += 1
+        r, c = state // cols, state % cols
+        depth = distances[state] + 1
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                neighbour = nr * cols + nc
+                if open_cells[neighbour] and distances[neighbour] < 0:
+                    distances[neighbour] = depth
+                    queue[tail] = neighbour
+                    tail += 1
+
+def shortest_path(grid, rows, cols, start, goal):
+    """A* path from start to goal as a list of flat states, or None if unreachable"""
+    grid = np.asarray(grid)
+    goal_r, goal_c = goal // cols, goal % cols
+    
+    def heuristic(state):
+        return abs(state // cols - goal_r) + abs(state % cols - goal_c)
+    
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(heuristic(start), 0, start)]
+    while heap:
+        _, g, state = heapq.heappop(heap)
+        if state == goal:
+            path = []
+            while state is not None:
+                path.append(state)
+                state = came_from[state]
+            return path[::-1]
+        if g > cost[state]:
+            continue
+        r, c = state // cols, state % cols
+        for dr, dc in MOVES:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            neighbour = nr * cols + nc
+            if grid[neighbour] == 0 or cost.get(neighbour, g + 2) <= g + 1:
+                continue
+            cost[neighbour] = g + 1
+            came_from[neighbour] = state
+            heapq.heappush(heap, (g + 1 + heuristic(neighbour), g + 1, neighbour))
+    return None
+
+def optimal_path_length(env):
+    """Fewest steps from the env's start to its goal, or None if unreachable"""
+    distance = int(distance_field(env.grid, env.rows, env.cols, env.goal)[env.start])
+    return distance if distance >= 0 else None
+
+def shortest_path_policy(env):
+    """Policy (int8, -1 for no action) that always steps one cell closer to the goal"""
+    distances = distance_field(env.grid, env.rows, env.cols, env.goal)
+    next_distances = distances[env.next_state]
+    closer = (distances[:, None] > 0) & (next_distances == distances[:, None] - 1) & ~env.policy_mask[:, None]
+    return np.where(closer.any(axis=1), np.argmax(closer, axis=1), -1).astype(np.int8)
+
+def evaluate_policy(env, actions, max_steps=None):
+    """Roll out a deterministic policy from every open cell at once.
+    
+    actions holds one action per state (values outside 0-3, e.g. -1, mean
+    "stay"). Instead of stepping each start cell, the policy's successor
+    map is composed with itself (pointer doubling): after k rounds every
+    cell knows where it is 2**k steps later and how many of those steps
+    were taken before reaching the goal, so the whole grid is evaluated
+    in O(log n_states) array operations.
+    
+    Returns per-cell `solved` (bool) and `steps` (-1 if not solved) arrays,
+    plus summary fields over the cells that can reach the goal at all:
+    solved_fraction, optimal_fraction, mean_optimality_gap (extra steps
+    over the BFS distance, averaged over solved cells) and the start
+    cell's steps.
+    """
+    actions = np.asarray(actions)
+    states = np.arange(env.n_states)
+    valid = (actions >= 0) & (actions < env.n_actions)
+    successor = np.where(valid, env.next_state[states, np.where(valid, actions, 0)], states)
+    successor[env.goal] = env.goal
+    
+    steps = (states != env.goal).astype(np.int64)
+    for _ in range(max(1, int(np.ceil(np.log2(env.n_states))))):
+        steps += steps[successor]
+        successor = successor[successor]
+    
+    optimal = distance_field(env.grid, env.rows, env.cols, env.goal)
+    candidates = (env.grid != 0) & (states != env.goal)
+    solved = candidates & (successor == env.goal)
+    if max_steps is not None:
+        solved &= steps <= max_steps
+    steps = np.where(solved, steps, -1)
+    
+    solvable = candidates & (optimal > 0)
+    n_solvable = int(solvable.sum())
+    gaps = (steps - optimal)[solved]
+    return {
+        'solved': solved,
+        'steps': steps,
+        'solved_fraction': float(solved[solvable].sum() / n_solvable) if n_solvable else 0.0,
+        'optimal_fraction': float((gaps == 0).sum() / n_solvable) if n_solvable else 0.0,
+        'mean_optimality_gap': float(gaps.mean()) if len(gaps) else None,
+        'start_steps': int(steps[env.start]) if solved[env.start] else None,
+    }
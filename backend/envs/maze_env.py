@@ -1,12 +1,25 @@
 import numpy as np
+from envs.maze_analysis import distance_field
 
 class MazeEnv:
-    """Maze environment for RL agents. Cells: 0=wall, 1=path, 2=start, 3=goal"""
+    """Maze environment for RL agents. Cells: 0=wall, 1=path, 2=start, 3=goal
     
-    def __init__(self, grid_flat=None, rows=16, cols=17, use_distance_shaping=False):
+    distance_mode picks the goal distance used by reward shaping and
+    exploring starts: 'manhattan' ignores walls, 'bfs' uses true path
+    lengths from envs.maze_analysis.
+    
+    The grid is stored as uint8 and open_states lists the non-wall cells;
+    states keep their row-major cell index so Q-tables and policies map
+    straight onto the grid.
+    """
+    
+    def __init__(self, grid_flat=None, rows=16, cols=17, use_distance_shaping=False, distance_mode='manhattan'):
+        if distance_mode not in ('manhattan', 'bfs'):
+            raise ValueError(f"Unknown distance mode: {distance_mode}")
         self.rows = rows
         self.cols = cols
         self.use_distance_shaping = use_distance_shaping
+        self.distance_mode = distance_mode
         
         if grid_flat is None:
             self.grid = np.array([
@@ -26,12 +39,16 @@ class MazeEnv:
                 [0, 1, 0, 1, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0],
                 [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 0],
                 [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-            ], dtype=int).flatten()
+            ], dtype=np.uint8).flatten()
             self.grid[0 * cols + 1] = 2
             self.grid[15 * cols + 15] = 3
         else:
-            assert len(grid_flat) == rows * cols
-            self.grid = np.array(grid_flat, dtype=int)
+            grid = np.asarray(grid_flat)
+            if grid.size != rows * cols:
+                raise ValueError(f"Maze has {grid.size} cells, expected {rows}x{cols}")
+            if grid.size and (grid.min() < 0 or grid.max() > 3):
+                raise ValueError("Maze cells must be 0 (wall), 1 (path), 2 (start) or 3 (goal)")
+            self.grid = grid.astype(np.uint8)  # always a copy; the start/goal fill below writes to it
             if 2 not in self.grid:
                 self.grid[0 * cols + 1] = 2
             if 3 not in self.grid:
@@ -46,40 +63,127 @@ class MazeEnv:
         self.goal = int(goals[0])
         self.n_states = rows * cols
         self.n_actions = 4
+        self.open_states = np.flatnonzero(self.grid != 0)
+        # States that get no action in a policy: walls and the goal
+        self.policy_mask = (self.grid == 0) | (self.grid == 3)
+        self._build_transitions()
+        self._exploring_start_cdf = None
+
+    def __getstate__(self):
+        # Ship only the arrays to worker processes; the tuple table is cheaper to rebuild than to pickle
+        state = self.__dict__.copy()
+        state.pop('_step_table', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def __getattr__(self, name):
+        # The step table is built on first use: the compiled engines, batched
+        # agents and planners only read the arrays, and on large mazes the
+        # table is by far the biggest part of the environment
+        if name == '_step_table':
+            self._build_step_table()
+            return self._step_table
+        raise AttributeError(name)
 
     def reset(self):
         """Reset agent to start position"""
         self.agent_pos = int(self.start)
         return int(self.agent_pos)
 
-    def step(self, state, action):
-        """Take action and return (next_state, reward, done)"""
-        r = state // self.cols
-        c = state % self.cols
-        nr, nc = r, c
-        
-        if action == 0: nr -= 1  # up
-        elif action == 1: nr += 1  # down
-        elif action == 2: nc -= 1  # left
-        else: nc += 1  # right
+    def sample_exploring_start(self, u=None):
+        """Draw a random open cell, weighted toward cells near the goal.
         
-        if nr < 0 or nr >= self.rows or nc < 0 or nc >= self.cols:
-            return state, -5, False
+        u is an optional uniform in [0, 1) from the caller's RNG; the global
+        numpy RNG is used when it is omitted.
+        """
+        if self._exploring_start_cdf is None:
+            self._build_exploring_starts()
+        if u is None:
+            u = np.random.random()
+        index = self._exploring_start_cdf.searchsorted(u, side='right')
+        return int(self._exploring_start_states[index])
+
+    def goal_distances(self):
+        """Distance from every cell to the goal under distance_mode.
         
-        next_idx = nr * self.cols + nc
+        BFS distances are -1 for walls and cells cut off from the goal.
+        """
+        if self.distance_mode == 'bfs':
+            return distance_field(self.grid, self.rows, self.cols, self.goal)
+        states = np.arange(self.n_states)
+        goal_r, goal_c = self.goal // self.cols, self.goal % self.cols
+        return np.abs(states // self.cols - goal_r) + np.abs(states % self.cols - goal_c)
+
+    def _build_exploring_starts(self):
+        """Cache the exploring-start distribution as a cumulative weight array"""
+        distances = self.goal_distances()
+        # Cells that cannot reach the goal only waste episodes
+        states = np.flatnonzero((self.grid != 0) & (distances >= 0))
+        distances = distances[states]
+        weights = (distances.max() + 1 - distances).astype(float)
+        cdf = np.cumsum(weights / weights.sum())
+        cdf /= cdf[-1]
+        self._exploring_start_states = states
+        self._exploring_start_cdf = cdf
+
+    def step(self, state, action):
+        """Take action and return (next_state, reward, done); state must be an open cell"""
+        return self._step_table[state * 4 + action]
+
+    def _build_transitions(self):
+        """Precompute next_state, reward and done for every (state, action) pair"""
+        states = np.arange(self.n_states)
+        r = states // self.cols
+        c = states % self.cols
+        nr = r[:, None] + np.array([-1, 1, 0, 0])  # up, down, left, right
+        nc = c[:, None] + np.array([0, 0, -1, 1])
         
-        if self.grid[next_idx] == 0:
-            return state, -5, False
+        inside = (nr >= 0) & (nr < self.rows) & (nc >= 0) & (nc < self.cols)
+        target = np.where(inside, nr * self.cols + nc, states[:, None])
+        blocked = ~inside | (self.grid[target] == 0)
         
-        if self.grid[next_idx] == 3:
-            return next_idx, 100, True
+        self.next_state = np.where(blocked, states[:, None], target)
+        self.done = ~blocked & (self.grid[target] == 3)
         
-        base_reward = -1
+        self.reward = np.full((self.n_states, self.n_actions), -1.0)
         if self.use_distance_shaping:
-            goal_r, goal_c = self.goal // self.cols, self.goal % self.cols
-            old_dist = abs(r - goal_r) + abs(c - goal_c)
-            new_dist = abs(nr - goal_r) + abs(nc - goal_c)
-            distance_reward = 0.1 * (old_dist - new_dist)
-            base_reward += distance_reward
+            if self.distance_mode == 'bfs':
+                distances = self.goal_distances()
+                # Unreachable cells count as one step beyond the farthest reachable one
+                distances = np.where(distances < 0, distances.max() + 1, distances)
+                old_dist = distances
+                new_dist = distances[target]
+            else:
+                goal_r, goal_c = self.goal // self.cols, self.goal % self.cols
+                old_dist = np.abs(r - goal_r) + np.abs(c - goal_c)
+                new_dist = np.abs(nr - goal_r) + np.abs(nc - goal_c)
+            self.reward += 0.1 * (old_dist[:, None] - new_dist)
+        self.reward[blocked] = -5.0
+        self.reward[self.done] = 100.0
+
+    def _build_step_table(self):
+        """Flat tuple table used by step(): plain list indexing is far cheaper than numpy scalar access.
+        
+        Only open cells get entries (agents never stand on a wall, so wall
+        slots hold None), and every entry shares its state and reward
+        objects instead of boxing a new int and float per (state, action).
+        """
+        n_actions = self.n_actions
+        states = np.empty(self.n_states, dtype=object)
+        states[:] = range(self.n_states)
+        rewards, reward_index = np.unique(self.reward[self.open_states], return_inverse=True)
+        shared_rewards = np.empty(len(rewards), dtype=object)
+        shared_rewards[:] = rewards.tolist()
         
-        return next_idx, base_reward, False
+        entries = zip(
+            states[self.next_state[self.open_states].ravel()].tolist(),
+            shared_rewards[reward_index.ravel()].tolist(),
+            self.done[self.open_states].ravel().tolist(),
+        )
+        slots = (self.open_states[:, None] * n_actions + np.arange(n_actions)).ravel().tolist()
+        table = [None] * (self.n_states * n_actions)
+        for slot, entry in zip(slots, entries):
+            table[slot] = entry
+        self._step_table = table
@@ -0,0 +1,76 @@
+"""Procedural mazes of any size.
+
+generate_maze carves a perfect maze (exactly one path between any two
+open cells) with an iterative randomized depth-first search over the
+odd-indexed cells, then optionally knocks out extra walls to create
+loops. Start and goal follow MazeEnv's defaults: top row, column 1 and
+bottom row, column cols - 2.
+"""
+import numpy as np
+
+def generate_maze(rows, cols, seed=None, loop_fraction=0.0):
+    """Flat uint8 grid (0=wall, 1=path, 2=start, 3=goal) of shape rows x cols.
+
+    loop_fraction is the share of the remaining interior walls between two
+    open cells to remove, turning the perfect maze into one with cycles.
+    """
+    if rows < 3 or cols < 3:
+        raise ValueError("A generated maze needs at least 3 rows and 3 columns")
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((rows, cols), dtype=np.uint8)
+    # Carve on the lattice of odd cells; an even-sized side leaves its last line as wall
+    cell_rows, cell_cols = (rows - 1) // 2, (cols - 1) // 2
+    n_cells = cell_rows * cell_cols
+
+    # Plain Python structures: this loop runs twice per lattice cell and numpy
+    # scalar access would dominate it. Random draws are taken in one batch.
+    visited = bytearray(n_cells)
+    draws = iter(rng.random(2 * n_cells).tolist())
+    carved = []
+    stack = [0]
+    visited[0] = 1
+    while stack:
+        cell = stack[-1]
+        r, c = divmod(cell, cell_cols)
+        options = []
+        if r > 0 and not visited[cell - cell_cols]:
+            options.append(cell - cell_cols)
+        if r < cell_rows - 1 and not visited[cell + cell_cols]:
+            options.append(cell + cell_cols)
+        if c > 0 and not visited[cell - 1]:
+            options.append(cell - 1)
+        if c < cell_cols - 1 and not visited[cell + 1]:
+            options.append(cell + 1)
+        if not options:
+            stack.pop()
+            continue
+        neighbour = options[int(next(draws, 0.0) * len(options))]
+        visited[neighbour] = 1
+        carved.append((cell, neighbour))
+        stack.append(neighbour)
+
+    lattice = np.arange(n_cells)
+    grid[2 * (lattice // cell_cols) + 1, 2 * (lattice % cell_cols) + 1] = 1
+    if carved:
+        pairs = np.array(carved)
+        # The wall between two lattice cells sits at the sum of their coordinates plus one
+        grid[pairs[:, 0] // cell_cols + pairs[:, 1] // cell_cols + 1,
+             pairs[:, 0] % cell_cols + pairs[:, 1] % cell_cols + 1] = 1
+
+    if loop_fraction > 0:
+        # Interior walls with open cells on opposite sides (left/right or above/below)
+        inner = grid[1:-1, 1:-1]
+        horizontal = (inner == 0) & (grid[1:-1, :-2] != 0) & (grid[1:-1, 2:] != 0)
+        vertical = (inner == 0) & (grid[:-2, 1:-1] != 0) & (grid[2:, 1:-1] != 0)
+        candidates = np.argwhere(horizontal | vertical) + 1
+        chosen = rng.random(len(candidates)) < loop_fraction
+        grid[candidates[chosen, 0], candidates[chosen, 1]] = 1
+
+    # Open a door from the top edge to the start and from the bottom edge to the goal
+    grid[0, 1] = 2
+    last_open_row = 2 * cell_rows - 1
+    goal_col = cols - 2
+    grid[last_open_row + 1:, goal_col] = 1
+    grid[last_open_row, min(goal_col, 2 * cell_cols - 1):goal_col + 1] = 1
+    grid[rows - 1, goal_col] = 3
+    return grid.ravel()
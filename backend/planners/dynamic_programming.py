@@ -0,0 +1,134 @@
+import time
+import numpy as np
+
+class _Planner:
+    """Shared pieces of the dynamic programming planners.
+    
+    MazeEnv is fully known and deterministic, so the optimal Q-table follows
+    directly from its next_state/reward/done tables:
+        Q[s, a] = reward[s, a] + gamma * (1 - done[s, a]) * V[next_state[s, a]]
+    """
+    
+    def __init__(self, n_states, n_actions, gamma=0.99, tol=1e-8, max_iterations=100000):
+        if not 0 <= gamma < 1:
+            # Undiscounted values of states that cannot reach the goal never settle
+            raise ValueError("Planners need 0 <= gamma < 1")
+        self.n_states = n_states
+        self.n_actions = n_actions
+        self.gamma = gamma
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self.Q = np.zeros((n_states, n_actions), dtype=float)
+        self.V = np.zeros(n_states, dtype=float)
+        self.iterations = 0
+        self.residuals = []
+        self.solve_time = 0.0
+
+    def _backup(self, env, V):
+        """One Bellman backup of every (state, action) pair against V"""
+        return env.reward + self.gamma * np.where(env.done, 0.0, V[env.next_state])
+
+    def rollout(self, env, max_steps=200):
+        """Follow the greedy policy from the start cell; returns (total_reward, steps, success)"""
+        state = env.reset()
+        total_reward = 0.0
+        for step in range(max_steps):
+            next_state, reward, done = env.step(state, int(np.argmax(self.Q[state])))
+            total_reward += reward
+            state = next_state
+            if done:
+                return total_reward, step + 1, True
+        return total_reward, max_steps, False
+
+    def get_metrics_summary(self, last_n=100):
+        """Convergence statistics of the last solve"""
+        return {
+            'iterations': self.iterations,
+            'final_residual': self.residuals[-1] if self.residuals else 0.0,
+            'solve_time': self.solve_time,
+            'q_value_mean': float(np.mean(self.Q)),
+            'q_value_max': float(np.max(self.Q)),
+            'q_value_min': float(np.min(self.Q)),
+            'q_value_std': float(np.std(self.Q)),
+        }
+
+    def get_policy(self, env):
+        """Extract best action for each state as int8; -1 for walls and the goal"""
+        policy = np.argmax(self.Q, axis=1).astype(np.int8)
+        policy[env.policy_mask] = -1
+        return policy
+
+class ValueIterationPlanner(_Planner):
+    """Value iteration: repeat V <- max_a Q(V) until the largest change is below tol"""
+    
+    def solve(self, env):
+        start_time = time.time()
+        V = self.V
+        for iteration in range(1, self.max_iterations + 1):
+            Q = self._backup(env, V)
+            V_new = Q.max(axis=1)
+            residual = float(np.max(np.abs(V_new - V)))
+            self.residuals.append(residual)
+            V = V_new
+            if residual < self.tol:
+                break
+        self.Q = self._backup(env, V)
+        self.V = self.Q.max(axis=1)
+        self.iterations = iteration
+        self.solve_time = time.time() - start_time
+        return self
+
+class PolicyIterationPlanner(_Planner):
+    """Policy iteration with iterative policy evaluation.
+    
+    Each round evaluates the current deterministic policy to within tol
+    (vectorized sweeps over all states), then improves it greedily. Stops
+    when the policy no longer changes.
+    """
+    
+    def __init__(self, n_states, n_actions, gamma=0.99, tol=1e-8, max_iterations=100000, max_rounds=1000):
+        super().__init__(n_states, n_actions, gamma=gamma, tol=tol, max_iterations=max_iterations)
+        self.max_rounds = max_rounds
+        self.rounds = 0
+
+    def solve(self, env):
+        start_time = time.time()
+        states = np.arange(env.n_states)
+        policy = np.zeros(env.n_states, dtype=np.int64)
+        V = self.V
+        for round_ in range(1, self.max_rounds + 1):
+            next_state = env.next_state[states, policy]
+            reward = env.reward[states, policy]
+            done = env.done[states, policy]
+            for _ in range(self.max_iterations):
+                V_new = reward + self.gamma * np.where(done, 0.0, V[next_state])
+                residual = float(np.max(np.abs(V_new - V)))
+                V = V_new
+                self.iterations += 1
+                if residual < self.tol:
+                    break
+            self.residuals.append(residual)
+            
+            Q = self._backup(env, V)
+            improved = np.argmax(Q, axis=1)
+            # Keep the current action on ties so the loop terminates
+            keep = Q[states, policy] >= Q[states, improved] - self.tol
+            improved[keep] = policy[keep]
+            if np.array_equal(improved, policy):
+                break
+            policy = improved
+        self.rounds = round_
+        self.Q = self._backup(env, V)
+        self.V = self.Q.max(axis=1)
+        self.solve_time = time.time() - start_time
+        return self
+
+    def get_metrics_summary(self, last_n=100):
+        summary = super().get_metrics_summary(last_n)
+        summary['policy_rounds'] = self.rounds
+        return summary
+
+PLANNERS = {
+    'value_iteration': ValueIterationPlanner,
+    'policy_iteration': PolicyIterationPlanner,
+}
@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# Tests import the backend the way uvicorn does, from inside backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def train_params():
+    """A /train request with its defaults, as the workers receive it"""
+    from app import TrainRequest
+    return TrainRequest().model_dump()
@@ -0,0 +1,38 @@
+import numpy as np
+from training.cache import ResultCache, cache_key
+
+def result(n_states=4):
+    return {'status': 'finished', 'success_rate': 0.5, 'q_table': np.zeros((n_states, 4)), 'policy': np.zeros(n_states, dtype=np.int8)}
+
+def test_cache_key_ignores_engine_and_order(train_params):
+    reordered = dict(reversed(list(train_params.items())))
+    assert cache_key(train_params) == cache_key(reordered)
+    assert cache_key(train_params) == cache_key({**train_params, 'engine': 'python', 'use_cache': False})
+    assert cache_key(train_params) != cache_key({**train_params, 'alpha': 0.5})
+    assert cache_key(train_params) != cache_key({**train_params, 'seed': 1})
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, directory='')
+    cache.put('a', result())
+    cache.put('b', result())
+    assert cache.get('a') is not None  # 'b' is now the oldest
+    cache.put('c', result())
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+def test_large_results_are_not_cached():
+    cache = ResultCache(max_entries=2, directory='', max_states=8)
+    cache.put('big', result(n_states=9))
+    assert cache.get('big') is None
+
+def test_disk_tier_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv('MAZE_RESULT_CACHE_DIR', raising=False)
+    assert not ResultCache().directory
+
+    cache = ResultCache(max_entries=1, directory=str(tmp_path))
+    cache.put('a', result())
+    cache.put('b', result())  # evicts 'a' from memory only
+    restored = cache.get('a')
+    assert restored['success_rate'] == 0.5
+    assert restored['q_table'] == np.zeros((4, 4)).tolist()
@@ -0,0 +1,52 @@
+import numpy as np
+from envs.maze_env import MazeEnv
+from training.early_stopping import ConvergenceMonitor
+from training.runner import run_training
+
+def checks(monitor, Q, episodes):
+    """should_stop at every check up to `episodes`"""
+    return [monitor.should_stop(ep, Q) for ep in range(monitor.check_every, episodes + 1, monitor.check_every)]
+
+def test_stops_after_patience_once_success_rate_holds():
+    monitor = ConvergenceMonitor(check_every=10, patience=2, success_rate=0.9)
+    for _ in range(100):
+        monitor.record(True)
+    assert checks(monitor, np.eye(4), 30) == [False, False, True]
+    assert not monitor.should_stop(35, np.eye(4))  # between checks
+
+def test_success_rate_gates_the_stop():
+    monitor = ConvergenceMonitor(check_every=10, patience=1, success_rate=0.9)
+    for _ in range(99):
+        monitor.record(True)
+    assert checks(monitor, np.eye(4), 30) == [False, False, False]  # window not full yet
+    for _ in range(20):
+        monitor.record(False)
+    assert checks(monitor, np.eye(4), 30) == [False, False, False]
+
+def test_q_tolerance_gates_the_stop():
+    monitor = ConvergenceMonitor(check_every=1, patience=1, success_rate=None, q_tol=0.01)
+    Q = np.eye(4)
+    assert not monitor.should_stop(1, Q)
+    assert not monitor.should_stop(2, Q + 0.1)  # same greedy actions, Q still moving
+    assert monitor.should_stop(3, Q + 0.1)
+    assert monitor.last_delta == 0
+
+def test_greedy_solved_evaluates_the_policy():
+    env = MazeEnv()
+    monitor = ConvergenceMonitor(check_every=1, patience=0, success_rate=None, greedy_solved=0.5)
+    assert not monitor.should_stop(1, np.zeros((env.n_states, env.n_actions)), env, 200)
+    assert monitor.last_solved < 0.5
+
+def test_from_params():
+    assert ConvergenceMonitor.from_params({'early_stopping': False}) is None
+    monitor = ConvergenceMonitor.from_params({'early_stopping': True, 'stop_check_every': 50, 'stop_q_tol': 0.1})
+    assert (monitor.check_every, monitor.patience, monitor.success_rate, monitor.q_tol) == (50, 3, 0.9, 0.1)
+
+def test_training_stops_early(train_params):
+    params = {**train_params, 'seed': 0, 'eval_every': 0, 'early_stopping': True}
+    result = run_training(None, params)
+    assert result['converged_episode'] is not None
+    assert result['converged_episode'] < params['episodes']
+    assert result['converged_episode'] % params['stop_check_every'] == 0
+    assert result['episode'] == result['converged_episode']
+    assert result['progress'] == 100
@@ -0,0 +1,48 @@
+import io
+import numpy as np
+import pytest
+from training.encoding import HEADER, decode_binary, encode_binary, encode_npz
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    Q = rng.normal(size=(20, 4))
+    policy = np.argmax(Q, axis=1).astype(np.int8)
+    policy[::3] = -1  # walls and the goal
+    return Q, policy
+
+@pytest.mark.parametrize('layout', ['dense', 'sparse'])
+@pytest.mark.parametrize('dtype', ['float32', 'float64'])
+def test_binary_round_trip(table, layout, dtype):
+    Q, policy = table
+    data = encode_binary(Q, policy, 4, 5, dtype=dtype, layout=layout)
+    decoded_Q, decoded_policy, rows, cols = decode_binary(data)
+    assert (rows, cols) == (4, 5)
+    np.testing.assert_array_equal(decoded_policy, policy)
+    expected = Q.astype(dtype)
+    if layout == 'sparse':
+        expected[policy < 0] = 0  # rows without an action are not sent
+    np.testing.assert_array_equal(decoded_Q, expected)
+
+def test_sparse_is_smaller_and_lists_with_none_encode(table):
+    Q, policy = table
+    as_list = [None if action < 0 else int(action) for action in policy]
+    dense = encode_binary(Q, as_list, 4, 5, layout='dense')
+    sparse = encode_binary(Q, as_list, 4, 5, layout='sparse')
+    assert len(dense) == HEADER.size + Q.size * 4 + len(policy)
+    assert len(sparse) < len(dense)
+    np.testing.assert_array_equal(decode_binary(sparse)[1], policy)
+
+def test_rejects_other_buffers(table):
+    Q, policy = table
+    with pytest.raises(ValueError):
+        decode_binary(b'NOPE' + encode_binary(Q, policy, 4, 5)[4:])
+    with pytest.raises(ValueError):
+        encode_binary(Q, policy, 4, 5, dtype='float16')
+
+def test_npz(table):
+    Q, policy = table
+    with np.load(io.BytesIO(encode_npz(Q, policy, 4, 5))) as data:
+        np.testing.assert_array_equal(data['q_table'], Q)
+        np.testing.assert_array_equal(data['policy'], policy)
+        assert int(data['rows']) == 4 and int(data['cols']) == 5
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from agents.kernels import NUMBA_AVAILABLE, resolve_engine
+from agents.q_learning import QLearningAgent
+from agents.sarsa import SarsaAgent
+from envs.maze_env import MazeEnv
+
+def train(agent_class, engine, episodes=300):
+    env = MazeEnv()
+    agent = agent_class(env.n_states, env.n_actions, rng=7, engine=engine)
+    outcomes = [agent.run_episode(env, max_steps=200) for _ in range(episodes)]
+    return agent, outcomes
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")
+@pytest.mark.parametrize('agent_class', [QLearningAgent, SarsaAgent])
+def test_numba_matches_python(agent_class):
+    python_agent, python_outcomes = train(agent_class, 'python')
+    numba_agent, numba_outcomes = train(agent_class, 'numba')
+    assert numba_outcomes == python_outcomes
+    np.testing.assert_array_equal(numba_agent.Q, python_agent.Q)
+    assert numba_agent.get_metrics_summary() == python_agent.get_metrics_summary()
+    for stat, series in python_agent.q_value_history.items():
+        np.testing.assert_array_equal(numba_agent.q_value_history[stat].tolist(), series.tolist())
+
+def test_resolve_engine():
+    assert resolve_engine('python') == 'python'
+    assert resolve_engine('auto') == ('numba' if NUMBA_AVAILABLE else 'python')
+    with pytest.raises(ValueError):
+        resolve_engine('cuda')
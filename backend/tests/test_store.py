@@ -0,0 +1,39 @@
+import os
+import numpy as np
+from training.runner import build_agent, build_env, run_training, save_checkpoint
+from training.store import FileJobStore
+
+def test_unfinished_jobs_survive_a_restart(tmp_path, train_params):
+    store = FileJobStore(str(tmp_path))
+    store['running'] = {'status': 'running', 'progress': 40, 'q_table': None}
+    store.save_params('running', train_params)
+    store['done'] = {'status': 'queued', 'q_table': None}
+    store.save_params('done', train_params)
+    store['done'].update({'status': 'finished', 'q_table': np.ones((3, 4)), 'episode_returns_history': [1.0, 2.0]})
+    store.save('done')
+
+    restarted = FileJobStore(str(tmp_path))
+    assert sorted(restarted) == ['done', 'running']
+    assert [job_id for job_id, _ in restarted.unfinished()] == ['running']
+    assert restarted.unfinished()[0][1]['alpha'] == train_params['alpha']
+    assert restarted['running']['progress'] == 40
+    done = restarted['done']
+    np.testing.assert_array_equal(done['q_table'], np.ones((3, 4)))
+    assert done['episode_returns_history'] == [1.0, 2.0]
+    assert not os.path.exists(tmp_path / 'jobs' / 'done.params.json')
+
+    del restarted['running']
+    assert 'running' not in FileJobStore(str(tmp_path))
+
+def test_training_resumes_from_checkpoint(tmp_path, train_params):
+    params = {**train_params, 'episodes': 60, 'seed': 3, 'eval_every': 0}
+    env = build_env(params)
+    agent = build_agent(params, env)
+    rewards = [agent.run_episode(env, max_steps=params['max_steps'])[0] for _ in range(50)]
+    path = str(tmp_path / 'job.npz')
+    save_checkpoint(path, agent, 50, 7, rewards)
+
+    result = run_training(None, {**params, 'checkpoint_path': path}, env)
+    assert result['episode'] == 60
+    assert len(result['episode_returns_history']) == 10  # only the episodes after the checkpoint
+    assert result['logs'][:50] == rewards
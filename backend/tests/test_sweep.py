@@ -0,0 +1,65 @@
+import pytest
+from training.sweep import SuccessiveHalving, rung_budgets, sample_configs
+
+def test_rung_budgets():
+    assert rung_budgets(900, 27) == [33, 100, 300, 900]
+    assert rung_budgets(900, 9, min_episodes=200) == [300, 900]
+    assert rung_budgets(1000, 1) == [1000]
+    assert rung_budgets(5, 27) == [1, 5]  # budgets never drop below one episode or repeat
+
+def test_halving_keeps_the_best_third_and_warm_starts_survivors():
+    configs = [{'alpha': a / 10} for a in range(1, 10)]
+    halving = SuccessiveHalving(configs, rung_budgets(90, len(configs)))
+    assert halving.budgets == [10, 30, 90]
+    for trial in halving.active:
+        assert halving.episodes_to_run(trial) == 10
+        halving.record(trial, {'success_rate': 1.0, 'detailed_metrics': {'avg_return': trial['config']['alpha']}})
+    halving.promote()
+    assert [t['config']['alpha'] for t in halving.active] == [0.9, 0.8, 0.7]
+    assert all(halving.episodes_to_run(trial) == 20 for trial in halving.active)
+    for trial in halving.active:
+        halving.record(trial, None if trial['config']['alpha'] == 0.9 else {'success_rate': 1.0, 'detailed_metrics': {'avg_return': 1.0}})
+    halving.promote()
+    assert [t['config']['alpha'] for t in halving.active] == [0.8]
+    assert halving.episodes_to_run(halving.active[0]) == 60
+    halving.record(halving.active[0], {'success_rate': 1.0, 'detailed_metrics': {'avg_return': 2.0}})
+    halving.promote()
+    assert halving.finished
+    assert halving.best()['config'] == {'alpha': 0.8}
+
+def test_random_configs_stay_in_range():
+    configs = sample_configs({'alpha': {'min': 0.01, 'max': 1, 'log': True}, 'max_steps': {'min': 50, 'max': 400}, 'gamma': [0.9, 0.99]}, 'random', 30, seed=1)
+    assert len(configs) == 30
+    assert all(0.01 <= c['alpha'] <= 1 and 50 <= c['max_steps'] <= 400 and c['gamma'] in (0.9, 0.99) for c in configs)
+    assert all(isinstance(c['max_steps'], int) for c in configs)
+    assert configs == sample_configs({'alpha': {'min': 0.01, 'max': 1, 'log': True}, 'max_steps': {'min': 50, 'max': 400}, 'gamma': [0.9, 0.99]}, 'random', 30, seed=1)
+
+@pytest.mark.parametrize('spec', [
+    {'min': 0, 'max': 1, 'log': True},
+    {'min': 0.5, 'max': 0.1},
+    {'min': 0.1, 'max': float('inf')},
+    {'min': 0.1},
+    [],
+])
+def test_bad_random_ranges_raise_value_error(spec):
+    with pytest.raises(ValueError):
+        sample_configs({'alpha': spec}, 'random', 5)
+
+def test_grid_is_the_cartesian_product():
+    assert sample_configs({'alpha': [0.1, 0.2], 'gamma': [0.9, 0.99]}) == [
+        {'alpha': 0.1, 'gamma': 0.9}, {'alpha': 0.1, 'gamma': 0.99},
+        {'alpha': 0.2, 'gamma': 0.9}, {'alpha': 0.2, 'gamma': 0.99},
+    ]
+    with pytest.raises(ValueError):
+        sample_configs({'episodes': [10]})
+
+@pytest.mark.parametrize('body', [
+    {'space': {'alpha': {'min': 0, 'max': 1, 'log': True}}, 'mode': 'random'},
+    {'space': {'epsilon': [0.1, 1.5]}},
+    {'space': {'max_steps': {'min': 0, 'max': 0.4}}, 'mode': 'random'},
+])
+def test_sweep_endpoint_rejects_invalid_spaces(body):
+    from fastapi.testclient import TestClient
+    from app import app
+    response = TestClient(app).post('/sweep', json=body)
+    assert response.status_code == 400
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from training.encoding import json_default
+
+logger = logging.getLogger(__name__)
+
+# Request fields that never change the trained result
+IGNORED_FIELDS = ('engine', 'use_cache')
+
+def cache_key(params):
+    """Canonical hash of a training request's maze, algorithm, hyperparameters and seed"""
+    canonical = {key: value for key, value in params.items() if key not in IGNORED_FIELDS}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class ResultCache:
+    """Finished training results keyed by cache_key.
+
+    An in-memory LRU holds the most recent `max_entries` results. The disk
+    tier is opt-in: when a directory is configured every result is also
+    written there as JSON, and memory misses fall back to it. Nothing evicts
+    those files, so the directory should be cleaned by whoever set it.
+    Results of mazes with more than `max_states` states are not cached: a
+    handful of them would fill memory. MAZE_RESULT_CACHE_SIZE,
+    MAZE_RESULT_CACHE_DIR and MAZE_RESULT_CACHE_MAX_STATES override the
+    defaults.
+    """
+
+    def __init__(self, max_entries=None, directory=None, max_states=None):
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get('MAZE_RESULT_CACHE_SIZE', 64))
+        self.directory = directory if directory is not None else os.environ.get('MAZE_RESULT_CACHE_DIR', '')
+        self.max_states = max_states if max_states is not None else int(os.environ.get('MAZE_RESULT_CACHE_MAX_STATES', 65536))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """The stored result for key, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key[:8]}: {e}")
+            return None
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """Store a finished result in memory and, if enabled, on disk"""
+        if result.get('q_table') is not None and len(result['q_table']) > self.max_states:
+            return
+        self._remember(key, result)
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f, default=json_default)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key[:8]}: {e}")
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop the in-memory tier; files on disk are kept"""
+        with self._lock:
+            self._entries.clear()
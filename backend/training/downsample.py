@@ -0,0 +1,66 @@
+"""Reduce long metric histories to a fixed number of points for charting.
+
+Both methods return the indices of the kept points, in increasing order,
+so callers can report which episodes the values belong to.
+"""
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+def lttb(values, points):
+    """Largest-Triangle-Three-Buckets: keeps the visual shape of a line chart.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.linspace(0, n - 1, points).astype(np.int64)
+
+    # points - 2 buckets over the interior; each is at least one point wide since n > points
+    edges = np.floor(np.linspace(1, n - 1, points - 1)).astype(np.int64)
+    x = np.arange(n, dtype=float)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = values[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], values[-1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[previous] - next_x) * (values[start:end] - values[previous])
+                      - (x[previous] - x[start:end]) * (next_y - values[previous]))
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+def minmax(values, points):
+    """Keep the minimum and maximum of each of points // 2 equal-width buckets"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if points >= n:
+        return np.arange(n)
+    buckets = max(1, points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    kept = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = values[start:end]
+        kept.extend(sorted({start + int(np.argmin(chunk)), start + int(np.argmax(chunk))}))
+    return np.array(kept, dtype=np.int64)
+
+def downsample(values, points, method='lttb'):
+    """(indices, values) of at most `points` representative points"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    values = np.asarray(values, dtype=float)
+    indices = lttb(values, points) if method == 'lttb' else minmax(values, points)
+    return indices, values[indices]
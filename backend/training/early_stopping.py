@@ -0,0 +1,85 @@
+"""Convergence checks that let a training job stop before its episode budget.
+
+Every `check_every` episodes the monitor compares the agent against the
+previous check. The job stops once every enabled criterion holds:
+
+  stop_patience      the greedy action of every state has not changed for
+                     this many consecutive checks (0 disables)
+  stop_success_rate  the success rate over the last 100 episodes reaches
+                     this value (None disables)
+  stop_q_tol         the largest change of any Q-value since the previous
+                     check is below this tolerance (None disables)
+  stop_greedy_solved the greedy policy, rolled out without exploration,
+                     reaches the goal from at least this fraction of the
+                     cells that can reach it (None disables)
+
+/train requires stop_patience >= 1 and at least one of the other three,
+since an unchanged greedy policy alone does not show the agent has learnt
+anything.
+"""
+from collections import deque
+import numpy as np
+from envs.maze_analysis import evaluate_policy
+
+SUCCESS_WINDOW = 100
+
+class ConvergenceMonitor:
+    """Decides when a training loop may stop early"""
+
+    def __init__(self, check_every=200, patience=3, success_rate=0.9, q_tol=None, greedy_solved=None):
+        self.check_every = max(1, check_every)
+        self.patience = patience
+        self.success_rate = success_rate
+        self.q_tol = q_tol
+        self.greedy_solved = greedy_solved
+        self.successes = deque(maxlen=SUCCESS_WINDOW)
+        self.stable_checks = 0
+        self.last_delta = None
+        self.last_solved = None
+        self._greedy = None
+        self._Q = None
+
+    @classmethod
+    def from_params(cls, params):
+        """A monitor for a training request, or None if early stopping is off"""
+        if not params.get('early_stopping'):
+            return None
+        return cls(
+            check_every=params.get('stop_check_every', 200),
+            patience=params.get('stop_patience', 3),
+            success_rate=params.get('stop_success_rate', 0.9),
+            q_tol=params.get('stop_q_tol'),
+            greedy_solved=params.get('stop_greedy_solved'),
+        )
+
+    def record(self, success):
+        self.successes.append(bool(success))
+
+    def should_stop(self, episode, Q, env=None, max_steps=None):
+        """Call after every episode (1-based count); True once the run has converged.
+        
+        env is needed only for the stop_greedy_solved criterion.
+        """
+        if episode % self.check_every:
+            return False
+        greedy = np.argmax(Q, axis=1)
+        if self._greedy is not None and np.array_equal(greedy, self._greedy):
+            self.stable_checks += 1
+        else:
+            self.stable_checks = 0
+        self.last_delta = None if self._Q is None else float(np.abs(Q - self._Q).max())
+        self._greedy = greedy
+        self._Q = Q.copy() if self.q_tol is not None else None
+
+        if self.patience and self.stable_checks < self.patience:
+            return False
+        if self.success_rate is not None:
+            if len(self.successes) < SUCCESS_WINDOW or np.mean(self.successes) < self.success_rate:
+                return False
+        if self.q_tol is not None and (self.last_delta is None or self.last_delta >= self.q_tol):
+            return False
+        if self.greedy_solved is not None:
+            self.last_solved = evaluate_policy(env, greedy, max_steps)['solved_fraction']
+            if self.last_solved < self.greedy_solved:
+                return False
+        return True
@@ -0,0 +1,108 @@
+"""Binary encodings of a finished job's Q-table and policy.
+
+The .bin layout is a fixed little-endian header followed by the raw Q-table
+and one int8 action per state (-1 for walls and the goal):
+
+    offset  size  field
+    0       4     magic b'MAZQ'
+    4       1     format version (1 = dense, 2 = sparse)
+    5       1     bytes per Q value (4 = float32, 8 = float64)
+    6       2     reserved
+    8       4     rows
+    12      4     cols
+    16      4     n_states
+    20      4     n_actions
+    24      ...   Q-table, n_states * n_actions values, row-major
+    ...     ...   policy, n_states int8 values
+
+The sparse layout (version 2) only carries the states that have an action.
+After the header comes a bitmap of those states, ceil(n_states / 8) bytes
+with the lowest bit first, then their Q rows and actions in state order.
+Decoding gives walls and the goal zero Q-values; on large mazes, where
+about half the cells are walls, this halves the download.
+"""
+import io
+import struct
+import numpy as np
+
+MAGIC = b'MAZQ'
+VERSION = 1
+SPARSE_VERSION = 2
+HEADER = struct.Struct('<4sBBHIIII')
+DTYPES = {'float32': np.dtype('<f4'), 'float64': np.dtype('<f8')}
+LAYOUTS = ('auto', 'dense', 'sparse')
+# 'auto' switches to the sparse layout above this many states
+SPARSE_MIN_STATES = 4096
+
+def policy_array(policy):
+    """Policy as int8 with -1 for walls/goal; accepts that array or a list with None"""
+    if isinstance(policy, np.ndarray):
+        return policy.astype(np.int8, copy=False)
+    return np.array([-1 if action is None else action for action in policy], dtype=np.int8)
+
+def policy_list(policy):
+    """JSON form of a policy: one int per state, None for walls and the goal"""
+    if policy is None:
+        return None
+    return [None if action < 0 else action for action in policy_array(policy).tolist()]
+
+def json_default(value):
+    """json.dump hook for the NumPy arrays kept in job records (e.g. policies)"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_binary(q_table, policy, rows, cols, dtype='float32', layout='dense'):
+    """Header + Q-table + int8 policy as bytes, dense or sparse (see module docstring)"""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype: {dtype}")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    Q = np.asarray(q_table, dtype=DTYPES[dtype])
+    actions = policy_array(policy)
+    n_states, n_actions = Q.shape
+    if layout == 'auto':
+        layout = 'sparse' if n_states > SPARSE_MIN_STATES else 'dense'
+    if layout == 'dense':
+        header = HEADER.pack(MAGIC, VERSION, Q.itemsize, 0, rows or 0, cols or 0, n_states, n_actions)
+        return header + Q.tobytes() + actions.tobytes()
+    mask = actions >= 0
+    header = HEADER.pack(MAGIC, SPARSE_VERSION, Q.itemsize, 0, rows or 0, cols or 0, n_states, n_actions)
+    return header + np.packbits(mask, bitorder='little').tobytes() + Q[mask].tobytes() + actions[mask].tobytes()
+
+def decode_binary(data):
+    """Inverse of encode_binary: (Q, policy, rows, cols)"""
+    magic, version, itemsize, _, rows, cols, n_states, n_actions = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (VERSION, SPARSE_VERSION):
+        raise ValueError("Not a MAZQ v1/v2 buffer")
+    dtype = DTYPES['float32'] if itemsize == 4 else DTYPES['float64']
+    if version == VERSION:
+        q_end = HEADER.size + n_states * n_actions * itemsize
+        Q = np.frombuffer(data, dtype=dtype, count=n_states * n_actions, offset=HEADER.size).reshape(n_states, n_actions)
+        policy = np.frombuffer(data, dtype=np.int8, count=n_states, offset=q_end)
+        return Q, policy, rows, cols
+    
+    bitmap_bytes = (n_states + 7) // 8
+    bitmap = np.frombuffer(data, dtype=np.uint8, count=bitmap_bytes, offset=HEADER.size)
+    mask = np.unpackbits(bitmap, count=n_states, bitorder='little').astype(bool)
+    n_set = int(mask.sum())
+    q_start = HEADER.size + bitmap_bytes
+    Q = np.zeros((n_states, n_actions), dtype=dtype)
+    Q[mask] = np.frombuffer(data, dtype=dtype, count=n_set * n_actions, offset=q_start).reshape(n_set, n_actions)
+    policy = np.full(n_states, -1, dtype=np.int8)
+    policy[mask] = np.frombuffer(data, dtype=np.int8, count=n_set, offset=q_start + n_set * n_actions * itemsize)
+    return Q, policy, rows, cols
+
+def encode_npz(q_table, policy, rows, cols):
+    """Compressed .npz with arrays q_table, policy, rows and cols"""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        q_table=np.asarray(q_table, dtype=float),
+        policy=policy_array(policy),
+        rows=rows or 0,
+        cols=cols or 0,
+    )
+    return buffer.getvalue()
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+class JobEvents:
+    """Fans job progress out to asyncio subscribers such as SSE streams.
+    
+    publish() is called from the scheduler's threads; each subscriber queue
+    is fed through its own event loop with call_soon_threadsafe.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(list)
+
+    def subscribe(self, job_id):
+        """Register a queue on the running event loop for job_id"""
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[job_id].append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            subscribers[:] = [(loop, q) for loop, q in subscribers if q is not queue]
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def publish(self, job_id, event):
+        """Deliver event to every subscriber of job_id"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, []))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # loop already closed
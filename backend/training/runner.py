@@ -0,0 +1,327 @@
+import logging
+import os
+import time
+import numpy as np
+from envs.maze_env import MazeEnv
+from envs.maze_analysis import evaluate_policy, grid_key, optimal_path_length, shortest_path_policy
+from agents.q_learning import QLearningAgent
+from agents.monte_carlo import MonteCarloAgent
+from agents.sarsa import SarsaAgent
+from planners.dynamic_programming import PLANNERS, ValueIterationPlanner
+from training.early_stopping import ConvergenceMonitor
+from training.stats import seed_report
+from training.warm_start import warm_start_q_table
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTS_PER_JOB = 10
+# Above this many states the optimal baseline follows BFS distances instead of
+# running value iteration, whose sweeps grow with the maze's longest path
+VALUE_ITERATION_BASELINE_STATES = 10000
+# Sweep cap and tolerance for that baseline; gamma = 0.99 needs about 1500
+# sweeps, and a run that hits the cap falls back to the BFS route as well
+BASELINE_MAX_ITERATIONS = 2000
+BASELINE_TOL = 1e-6
+
+# Set in each pool worker by init_worker; progress messages go back to the API process
+_progress_queue = None
+
+def init_worker(progress_queue):
+    """Pool initializer: remember the queue used to report progress"""
+    global _progress_queue
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+    )
+    _progress_queue = progress_queue
+
+def report(job_id, **fields):
+    """Send a partial job update to the API process; job_id None means an untracked run"""
+    if _progress_queue is not None and job_id is not None:
+        _progress_queue.put((job_id, fields))
+
+def uses_shaping(params):
+    """Whether the request's algorithm trains on the distance-shaped rewards"""
+    return params['algorithm'] == "monte_carlo"
+
+def build_env(params):
+    """Create the maze for a training request"""
+    use_shaping = uses_shaping(params)
+    distance_mode = params.get('distance_mode', 'manhattan')
+    maze = params.get('maze')
+    if maze is not None and len(maze) and params.get('rows') and params.get('cols'):
+        return MazeEnv(grid_flat=maze, rows=params['rows'], cols=params['cols'], use_distance_shaping=use_shaping, distance_mode=distance_mode)
+    return MazeEnv(use_distance_shaping=use_shaping, distance_mode=distance_mode)
+
+def build_agent(params, env):
+    """Instantiate the agent named by params['algorithm']"""
+    algorithm = params['algorithm']
+    q_stats_every = params.get('q_stats_every', 1)
+    seed = params.get('seed')
+    engine = params.get('engine', 'auto')
+    if algorithm == "q_learning":
+        return QLearningAgent(env.n_states, env.n_actions, alpha=params['alpha'], gamma=params['gamma'], epsilon=params['epsilon'], q_stats_every=q_stats_every, rng=seed, engine=engine)
+    if algorithm == "monte_carlo":
+        optimistic_init = 100.0
+        mc_epsilon = max(params['epsilon'], 0.2)
+        return MonteCarloAgent(env.n_states, env.n_actions, gamma=params['gamma'], epsilon=mc_epsilon, method=params['mc_method'], optimistic_init=optimistic_init,
+                               returns_mode=params.get('mc_returns', 'incremental'), step_size=params.get('mc_step_size'), q_stats_every=q_stats_every, rng=seed)
+    if algorithm == "sarsa":
+        return SarsaAgent(env.n_states, env.n_actions, alpha=params['alpha'], gamma=params['gamma'], epsilon=params['epsilon'], q_stats_every=q_stats_every, rng=seed, engine=engine)
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+def save_checkpoint(path, agent, episode, success_count, rewards_window):
+    """Write the agent's Q-table and loop counters so the job can resume"""
+    arrays = {
+        'Q': agent.Q,
+        'episode': episode,
+        'success_count': success_count,
+        'rewards': np.asarray(rewards_window[-200:], dtype=float),
+    }
+    if hasattr(agent, 'visit_counts'):
+        arrays['visit_counts'] = agent.visit_counts
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    """Arrays saved by save_checkpoint, or None if there is no checkpoint"""
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+def greedy_evaluation(env, policy, max_steps):
+    """Summary of evaluate_policy for a get_policy() array, without the per-cell arrays"""
+    evaluation = evaluate_policy(env, policy, max_steps)
+    return {key: value for key, value in evaluation.items() if key not in ('solved', 'steps')}
+
+def run_planning(job_id, params, env):
+    """Solve the maze with a dynamic programming planner instead of episodes"""
+    planner = PLANNERS[params['algorithm']](env.n_states, env.n_actions, gamma=params['gamma']).solve(env)
+    total_reward, steps, success = planner.rollout(env, max_steps=params['max_steps'])
+    logger.info(f"Planner {params['algorithm']} converged in {planner.iterations} sweeps ({planner.solve_time * 1000:.1f} ms)")
+    
+    metrics_summary = planner.get_metrics_summary()
+    metrics_summary['training_duration'] = planner.solve_time
+    metrics_summary['optimal_return'] = total_reward
+    metrics_summary['optimal_episode_length'] = steps
+    metrics_summary['optimal_path_length'] = optimal_path_length(env)
+    policy = planner.get_policy(env)
+    metrics_summary['greedy_eval'] = greedy_evaluation(env, policy, params['max_steps'])
+    return {
+        'episode': params['episodes'],
+        'progress': 100,
+        'avg_reward': total_reward,
+        'success_rate': 1.0 if success else 0.0,
+        'logs': [total_reward],
+        'status': 'finished',
+        'policy': policy,
+        'q_table': planner.Q,
+        'detailed_metrics': metrics_summary,
+        'q_value_history': {},
+        'episode_returns_history': [],
+        'episode_lengths_history': [],
+        'loss_history': planner.residuals,
+        'history_stride': 1,
+        'rows': env.rows,
+        'cols': env.cols,
+    }
+
+# Baselines per (maze, reward variant, gamma, max_steps); repeated seeds reuse them
+_optimal_baselines = {}
+
+def _policy_rollout(env, policy, max_steps):
+    """(total_reward, steps) of following a fixed policy from the start cell"""
+    state = env.start
+    total_reward = 0.0
+    for step in range(max_steps):
+        action = int(policy[state])
+        if action < 0:
+            break
+        total_reward += float(env.reward[state, action])
+        if env.done[state, action]:
+            return total_reward, step + 1
+        state = int(env.next_state[state, action])
+    return total_reward, max_steps
+
+def score_against_optimal(metrics_summary, env, gamma, max_steps):
+    """Add the optimal greedy return/length as a baseline.
+    
+    Small mazes use value iteration; large ones, gamma >= 1 (where value
+    iteration does not converge) and solves that hit the sweep cap follow
+    the BFS shortest path, which is the same route for the unshaped rewards.
+    """
+    key = (grid_key(env.grid, env.rows, env.cols), env.use_distance_shaping, env.distance_mode, gamma, max_steps)
+    if key not in _optimal_baselines:
+        if len(_optimal_baselines) >= 64:
+            _optimal_baselines.clear()
+        baseline = None
+        if gamma < 1 and env.n_states <= VALUE_ITERATION_BASELINE_STATES:
+            planner = ValueIterationPlanner(env.n_states, env.n_actions, gamma=gamma, tol=BASELINE_TOL,
+                                            max_iterations=BASELINE_MAX_ITERATIONS).solve(env)
+            if planner.residuals[-1] < BASELINE_TOL:
+                baseline = planner.rollout(env, max_steps=max_steps)[:2]
+        if baseline is None:
+            baseline = _policy_rollout(env, shortest_path_policy(env), max_steps)
+        _optimal_baselines[key] = baseline
+    optimal_return, optimal_length = _optimal_baselines[key]
+    metrics_summary['optimal_return'] = optimal_return
+    metrics_summary['optimal_episode_length'] = optimal_length
+    metrics_summary['return_gap'] = optimal_return - metrics_summary.get('avg_return', 0.0)
+    metrics_summary['optimal_path_length'] = optimal_path_length(env)
+
+def run_training(job_id, params, env=None):
+    """Train one agent and return the finished job fields.
+    
+    Runs inside a pool worker. Progress is reported through `report` at
+    every 1% of the episodes; the return value carries the policy,
+    Q-table and metric histories. env may be a MazeEnv prebuilt by the API
+    process (e.g. shared by the members of a comparison). Multi-seed jobs
+    are split by the API into one run_training call per seed (seed_params)
+    and merged with combine_seeds.
+    """
+    report(job_id, status='running')
+    if env is None:
+        env = build_env(params)
+    if params['algorithm'] in PLANNERS:
+        return run_planning(job_id, params, env)
+    agent = build_agent(params, env)
+    if params.get('warm_start'):
+        agent.load_q_table(warm_start_q_table(params['warm_start'], env, agent.Q))
+    
+    algorithm = params['algorithm']
+    episodes = params['episodes']
+    start_time = time.time()
+    success_count = 0
+    rewards_window = []
+    reported = 0
+    progress = {}
+    start_episode = 0
+    checkpoint_path = params.get('checkpoint_path')
+    checkpoint_every = max(1, episodes // CHECKPOINTS_PER_JOB)
+    monitor = ConvergenceMonitor.from_params(params)
+    converged_episode = None
+    eval_every = params.get('eval_every', 0)
+    
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        # Metric histories and the RNG stream restart; Q and the counters carry over
+        agent.load_q_table(checkpoint['Q'])
+        if 'visit_counts' in checkpoint:
+            agent.visit_counts[:] = checkpoint['visit_counts']
+        start_episode = int(checkpoint['episode'])
+        success_count = int(checkpoint['success_count'])
+        rewards_window = checkpoint['rewards'].tolist()
+        reported = len(rewards_window)
+        logger.info(f"Resuming from checkpoint at episode {start_episode}")
+    
+    for ep in range(start_episode, episodes):
+        current_epsilon = params['epsilon']
+        if algorithm.startswith("monte_carlo"):
+            mc_initial = max(params['epsilon'], 0.2)
+            mc_min = max(params['min_epsilon'], 0.05)
+            current_epsilon = max(mc_min, mc_initial * (params['epsilon_decay'] ** ep))
+            agent.epsilon = current_epsilon
+        
+        exploring_start = algorithm == "monte_carlo"
+        total_reward, success = agent.run_episode(env, max_steps=params['max_steps'], epsilon=current_epsilon, exploring_start=exploring_start)
+        rewards_window.append(total_reward)
+        if success:
+            success_count += 1
+        if monitor is not None:
+            monitor.record(success)
+            if monitor.should_stop(ep + 1, agent.Q, env, params['max_steps']):
+                converged_episode = ep + 1
+        
+        if (ep + 1) % max(1, episodes // 100) == 0 or ep == episodes - 1 or converged_episode:
+            avg_reward = float(sum(rewards_window[-100:]) / min(len(rewards_window), 100))
+            success_rate = float(success_count / (ep + 1))
+            progress = {
+                'episode': ep + 1,
+                'progress': 100 if converged_episode else int(((ep + 1) / episodes) * 100),
+                'avg_reward': avg_reward,
+                'success_rate': success_rate,
+            }
+            # Only the rewards since the previous checkpoint cross the process boundary
+            report(job_id, rewards=rewards_window[reported:], **progress)
+            reported = len(rewards_window)
+            if job_id is not None:
+                logger.info(f"Episode {ep + 1}/{episodes} - Reward: {avg_reward:.2f} - Success: {success_rate*100:.1f}%")
+        
+        if eval_every and (ep + 1) % eval_every == 0:
+            # Exploration-free quality signal: the greedy policy from every open cell
+            report(job_id, greedy_eval=greedy_evaluation(env, agent.get_policy(env), params['max_steps']))
+        
+        if converged_episode:
+            if job_id is not None:
+                logger.info(f"Converged at episode {converged_episode}/{episodes}, stopping early")
+            break
+        
+        if checkpoint_path and (ep + 1) % checkpoint_every == 0 and ep < episodes - 1:
+            save_checkpoint(checkpoint_path, agent, ep + 1, success_count, rewards_window)
+    
+    training_duration = time.time() - start_time
+    episodes_run = (converged_episode or episodes) - start_episode
+    
+    metrics_summary = agent.get_metrics_summary(last_n=100)
+    metrics_summary['training_duration'] = training_duration
+    metrics_summary['episodes_per_sec'] = episodes_run / training_duration
+    metrics_summary['converged_episode'] = converged_episode
+    policy = agent.get_policy(env)
+    metrics_summary['greedy_eval'] = greedy_evaluation(env, policy, params['max_steps'])
+    score_against_optimal(metrics_summary, env, params['gamma'], params['max_steps'])
+    
+    # Repeat the last progress fields: the result may overtake the queued message
+    return {
+        **progress,
+        'logs': rewards_window[-200:],
+        'status': 'finished',
+        'policy': policy,
+        'q_table': agent.Q,
+        'detailed_metrics': metrics_summary,
+        'q_value_history': {stat: series.tolist() for stat, series in agent.q_value_history.items()},
+        'episode_returns_history': agent.episode_returns.tolist(),
+        'episode_lengths_history': agent.episode_lengths.tolist(),
+        'loss_history': agent.loss_history.tolist(),
+        'history_stride': agent.metrics.stride,
+        'rows': env.rows,
+        'cols': env.cols,
+        'converged_episode': converged_episode,
+    }
+
+def seed_params(params, k):
+    """Parameters of the k-th run of a multi-seed job: seed params['seed'] (default 0) + k.
+    
+    Mid-run greedy evaluations are turned off: they would be reported under
+    the seed's own ID, which has no job record. The final one still runs.
+    """
+    return {**params, 'seeds': 1, 'seed': (params.get('seed') or 0) + k, 'checkpoint_path': None, 'eval_every': 0}
+
+def seed_progress(runs, seeds):
+    """Progress fields of a multi-seed job from its finished runs"""
+    return {
+        'progress': int(len(runs) / seeds * 100),
+        'avg_reward': float(sum(run['avg_reward'] for run in runs) / len(runs)),
+        'success_rate': float(sum(run['success_rate'] for run in runs) / len(runs)),
+    }
+
+def combine_seeds(runs, params, duration):
+    """Result of a multi-seed job from its runs in seed order.
+    
+    Carries the first seed's policy and Q-table plus `seed_stats` (see
+    training.stats.seed_report); throughput counts every seed's episodes
+    against the job's wall time.
+    """
+    first = runs[0]
+    metrics_summary = dict(first['detailed_metrics'])
+    metrics_summary['training_duration'] = duration
+    episodes_run = sum(run['converged_episode'] or params['episodes'] for run in runs)
+    metrics_summary['episodes_per_sec'] = episodes_run / duration
+    return {
+        **first,
+        **seed_progress(runs, len(runs)),
+        'detailed_metrics': metrics_summary,
+        'seed_stats': seed_report(runs, params['max_steps']),
+    }
@@ -0,0 +1,121 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from training import runner
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the scheduler is already holding its maximum number of jobs"""
+
+class TrainingScheduler:
+    """Runs training jobs on a bounded process pool.
+    
+    Jobs are started in FIFO order by the pool. Admission control caps the
+    number of jobs that may be running or waiting at once. Workers send
+    progress through a multiprocessing queue which a listener thread feeds to
+    `on_progress(job_id, fields)`; `on_done(job_id, result, error)` is called
+    when a job returns or raises.
+    """
+    
+    def __init__(self, on_progress, on_done, max_workers=None, max_queued=None):
+        self.max_workers = max_workers or int(os.environ.get('MAZE_TRAIN_WORKERS', 0)) or os.cpu_count() or 1
+        self.max_queued = max_queued if max_queued is not None else int(os.environ.get('MAZE_TRAIN_QUEUE', 32))
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None
+        self._queue = None
+        self._listener = None
+        self._closed = False
+
+    def _ensure_started(self):
+        """Create the pool lazily so importing the app never forks"""
+        if self._executor is not None:
+            return
+        # Spawned workers do not inherit locks held by the server's threads at fork time
+        context = multiprocessing.get_context('spawn')
+        self._queue = context.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=runner.init_worker,
+            initargs=(self._queue,),
+        )
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+        logger.info(f"Training pool started with {self.max_workers} workers")
+
+    def _listen(self):
+        """Forward worker progress messages until shutdown"""
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            job_id, fields = message
+            try:
+                self.on_progress(job_id, fields)
+            except Exception:
+                logger.exception(f"Progress handler failed for job {job_id}")
+
+    @property
+    def closed(self):
+        """Whether shutdown has been called; no further jobs are accepted"""
+        return self._closed
+
+    @property
+    def pending(self):
+        """Number of jobs running or waiting for a worker"""
+        return len(self._pending)
+
+    @property
+    def free_slots(self):
+        """Jobs that can still be admitted before submit raises QueueFullError"""
+        return self.max_workers + self.max_queued - len(self._pending)
+
+    def submit(self, job_id, fn, *args):
+        """Queue fn(job_id, *args) on the pool, or raise QueueFullError"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Training scheduler is shut down")
+            if len(self._pending) >= self.max_workers + self.max_queued:
+                raise QueueFullError(f"{len(self._pending)} training jobs already pending")
+            self._ensure_started()
+            self._pending.add(job_id)
+            future = self._executor.submit(fn, job_id, *args)
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return future
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            self._pending.discard(job_id)
+        # Jobs killed by shutdown are reported like cancelled ones so they can be resumed
+        if future.cancelled() or self._closed:
+            self.on_done(job_id, None, 'cancelled')
+            return
+        error = future.exception()
+        self.on_done(job_id, None if error else future.result(), error)
+
+    def shutdown(self):
+        """Stop accepting work and tear down the pool and listener.
+        
+        Running jobs are killed rather than awaited. The workers are gone
+        before the listener stops, so none is left blocked at exit flushing
+        progress into a queue nobody reads.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is None:
+            return
+        # ProcessPoolExecutor has no public way to stop a running task before Python 3.14
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=True, cancel_futures=True)
+        # A killed worker may leave a partial message behind; never wait on the queue at exit
+        self._queue.cancel_join_thread()
+        self._queue.put(None)
+        self._listener.join(timeout=5)
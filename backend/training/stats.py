@@ -0,0 +1,69 @@
+"""Aggregation of repeated training runs (e.g. one per seed).
+
+Confidence intervals use the normal approximation, mean +/- 1.96 standard
+errors, which is adequate for the 10-30 seeds these reports are meant for.
+"""
+import numpy as np
+
+Z_95 = 1.96
+
+def mean_ci(values):
+    """{'mean', 'ci95'} of a sample; ci95 is the half-width of the interval"""
+    values = np.asarray([v for v in values if v is not None], dtype=float)
+    if len(values) == 0:
+        return {'mean': None, 'ci95': None}
+    if len(values) == 1:
+        return {'mean': float(values[0]), 'ci95': 0.0}
+    return {'mean': float(values.mean()), 'ci95': float(Z_95 * values.std(ddof=1) / np.sqrt(len(values)))}
+
+def convergence_episode(episode_lengths, max_steps, stride=1, window=100, threshold=0.9):
+    """First episode at which the success rate over the last `window` episodes reaches threshold.
+
+    episode_lengths is a stored history (one value per `stride` episodes);
+    an episode counts as a success if it ended before max_steps. Returns
+    None if the run never converged.
+    """
+    successes = (np.asarray(episode_lengths) < max_steps).astype(float)
+    width = max(1, window // stride)
+    if len(successes) < width:
+        return None
+    rolling = np.convolve(successes, np.ones(width) / width, mode='valid')
+    hits = np.flatnonzero(rolling >= threshold)
+    return int((hits[0] + width) * stride) if len(hits) else None
+
+def curve_band(curves, stride=1, points=200):
+    """Mean curve with a 95% band across runs, bucket-averaged to at most `points` values"""
+    length = min(len(curve) for curve in curves)
+    curves = np.array([curve[:length] for curve in curves], dtype=float)
+    if length == 0:
+        return {'episodes': [], 'mean': [], 'lower': [], 'upper': []}
+    edges = np.linspace(0, length, min(points, length) + 1).astype(int)
+    buckets = np.add.reduceat(curves, edges[:-1], axis=1) / np.diff(edges)
+    mean = buckets.mean(axis=0)
+    if len(curves) > 1:
+        half_width = Z_95 * buckets.std(axis=0, ddof=1) / np.sqrt(len(curves))
+    else:
+        half_width = np.zeros_like(mean)
+    return {
+        'episodes': (edges[:-1] * stride).tolist(),
+        'mean': mean.tolist(),
+        'lower': (mean - half_width).tolist(),
+        'upper': (mean + half_width).tolist(),
+    }
+
+def seed_report(runs, max_steps):
+    """Aggregate the results of several runs of one configuration"""
+    convergence = [
+        convergence_episode(run['episode_lengths_history'], max_steps, run['history_stride'])
+        for run in runs
+    ]
+    return {
+        'seeds': len(runs),
+        'success_rate': mean_ci(run['success_rate'] for run in runs),
+        'avg_return': mean_ci(run['detailed_metrics'].get('avg_return') for run in runs),
+        'convergence_episode': {
+            **mean_ci(convergence),
+            'converged_fraction': sum(c is not None for c in convergence) / len(runs),
+        },
+        'return_curve': curve_band([run['episode_returns_history'] for run in runs], runs[0]['history_stride']),
+    }
@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import threading
+from collections.abc import MutableMapping
+import numpy as np
+from training.encoding import json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+
+# Job fields written to results/logs instead of the job record
+METRIC_FIELDS = ('detailed_metrics', 'q_value_history', 'episode_returns_history', 'episode_lengths_history', 'loss_history')
+
+class MemoryJobStore(MutableMapping):
+    """Job records in a process-local dict; everything is lost on restart.
+
+    The app mutates records in place and calls save(job_id) when one should
+    be persisted, so other stores can write through at those points.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+
+    def __getitem__(self, job_id):
+        return self._jobs[job_id]
+
+    def __setitem__(self, job_id, job):
+        self._jobs[job_id] = job
+
+    def __delitem__(self, job_id):
+        del self._jobs[job_id]
+
+    def __iter__(self):
+        return iter(list(self._jobs))
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def save(self, job_id):
+        """Persist the current state of a job record"""
+
+    def save_params(self, job_id, params):
+        """Remember the training parameters so the job can be resumed"""
+
+    def checkpoint_path(self, job_id):
+        """Where the worker should write periodic checkpoints, or None"""
+        return None
+
+    def unfinished(self):
+        """(job_id, params) of jobs that were queued or running at shutdown"""
+        return []
+
+class FileJobStore(MemoryJobStore):
+    """Job records persisted under a results directory.
+
+    Layout:
+      jobs/<id>.json         record without Q-table and metric histories
+      jobs/<id>.params.json  training parameters, kept for resuming
+      policies/<id>.npy      Q-table, loaded memory-mapped (read-only)
+      logs/<id>.json         detailed metrics and histories
+      checkpoints/<id>.npz   written by the worker while training
+
+    Records are loaded lazily on first access.
+    """
+
+    def __init__(self, directory=None):
+        super().__init__()
+        self.directory = directory or DEFAULT_DIRECTORY
+        self._lock = threading.Lock()
+        for sub in ('jobs', 'policies', 'logs', 'checkpoints'):
+            os.makedirs(os.path.join(self.directory, sub), exist_ok=True)
+
+    def _path(self, sub, job_id, suffix):
+        return os.path.join(self.directory, sub, f"{job_id}{suffix}")
+
+    def _write_json(self, path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, default=json_default)
+        os.replace(tmp_path, path)
+
+    def _stored_ids(self):
+        names = os.listdir(os.path.join(self.directory, 'jobs'))
+        return [name[:-5] for name in names if name.endswith('.json') and not name.endswith('.params.json')]
+
+    def _load(self, job_id):
+        with open(self._path('jobs', job_id, '.json')) as f:
+            job = json.load(f)
+        q_path = self._path('policies', job_id, '.npy')
+        if os.path.exists(q_path):
+            job['q_table'] = np.load(q_path, mmap_mode='r')
+        logs_path = self._path('logs', job_id, '.json')
+        if os.path.exists(logs_path):
+            with open(logs_path) as f:
+                job.update(json.load(f))
+        return job
+
+    def __getitem__(self, job_id):
+        if job_id not in self._jobs:
+            try:
+                job = self._load(job_id)
+            except FileNotFoundError:
+                raise KeyError(job_id)
+            self._jobs.setdefault(job_id, job)
+        return self._jobs[job_id]
+
+    def __contains__(self, job_id):
+        return job_id in self._jobs or os.path.exists(self._path('jobs', job_id, '.json'))
+
+    def __setitem__(self, job_id, job):
+        self._jobs[job_id] = job
+        self.save(job_id)
+
+    def __delitem__(self, job_id):
+        self._jobs.pop(job_id, None)
+        for sub, suffix in (('jobs', '.json'), ('jobs', '.params.json'), ('policies', '.npy'), ('logs', '.json'), ('checkpoints', '.npz')):
+            try:
+                os.remove(self._path(sub, job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def __iter__(self):
+        return iter(set(self._jobs) | set(self._stored_ids()))
+
+    def __len__(self):
+        return len(set(self._jobs) | set(self._stored_ids()))
+
+    def save(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        record = {key: value for key, value in job.items() if key != 'q_table' and key not in METRIC_FIELDS}
+        with self._lock:
+            try:
+                self._write_json(self._path('jobs', job_id, '.json'), record)
+                if job['status'] in ('finished', 'error'):
+                    # A memory-mapped table was loaded from this very file and is already saved
+                    if job.get('q_table') is not None and not isinstance(job['q_table'], np.memmap):
+                        np.save(self._path('policies', job_id, '.npy'), np.asarray(job['q_table'], dtype=float))
+                    self._write_json(self._path('logs', job_id, '.json'), {key: job.get(key) for key in METRIC_FIELDS})
+                    for path in (self._path('checkpoints', job_id, '.npz'), self._path('jobs', job_id, '.params.json')):
+                        if os.path.exists(path):
+                            os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not persist job {job_id[:8]}: {e}")
+
+    def save_params(self, job_id, params):
+        self._write_json(self._path('jobs', job_id, '.params.json'), params)
+
+    def checkpoint_path(self, job_id):
+        return self._path('checkpoints', job_id, '.npz')
+
+    def unfinished(self):
+        resumable = []
+        for job_id in self._stored_ids():
+            params_path = self._path('jobs', job_id, '.params.json')
+            if self[job_id]['status'] in ('queued', 'running') and os.path.exists(params_path):
+                with open(params_path) as f:
+                    resumable.append((job_id, json.load(f)))
+        return resumable
+
+def create_job_store(kind=None, directory=None):
+    """The store named by kind or MAZE_JOB_STORE: 'memory' (default) or 'files'"""
+    kind = kind or os.environ.get('MAZE_JOB_STORE', 'memory')
+    if kind == 'memory':
+        return MemoryJobStore()
+    if kind == 'files':
+        return FileJobStore(directory or os.environ.get('MAZE_RESULTS_DIR'))
+    raise ValueError(f"Unknown job store: {kind}")
@@ -0,0 +1,144 @@
+"""Hyperparameter search with successive halving.
+
+A sweep trains every configuration for a small number of episodes, keeps
+the best 1/eta of them, continues the survivors (warm-started from their
+own Q-tables) up to the next budget, and so on until the full episode
+count. Poor configurations are therefore cut off after a fraction of their
+episodes. This module only holds the bookkeeping; app.py submits the trials
+to the training pool.
+"""
+import itertools
+import math
+import numpy as np
+
+SWEEPABLE = ('alpha', 'gamma', 'epsilon', 'epsilon_decay', 'min_epsilon', 'max_steps')
+METRICS = ('avg_return', 'success_rate', 'avg_discounted_return')
+
+def sample_configs(space, mode='grid', n_trials=20, seed=None):
+    """Configurations to try.
+
+    space maps a parameter to a list of values, or (random mode only) to
+    {'min': a, 'max': b, 'log': bool} for a continuous range. Grid mode
+    takes the cartesian product of the lists; random mode draws n_trials
+    configurations.
+    """
+    for name in space:
+        if name not in SWEEPABLE:
+            raise ValueError(f"Cannot sweep {name}; choose from {', '.join(SWEEPABLE)}")
+    if mode == 'grid':
+        for name, values in space.items():
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"Grid search needs a non-empty list of values for {name}")
+        names = list(space)
+        return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if mode != 'random':
+        raise ValueError(f"Unknown search mode: {mode}")
+    for name, spec in space.items():
+        _check_spec(name, spec)
+
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_trials):
+        config = {}
+        for name, spec in space.items():
+            if isinstance(spec, list):
+                config[name] = spec[int(rng.integers(len(spec)))]
+            elif spec.get('log'):
+                config[name] = float(np.exp(rng.uniform(np.log(spec['min']), np.log(spec['max']))))
+            else:
+                config[name] = float(rng.uniform(spec['min'], spec['max']))
+        if 'max_steps' in config:
+            config['max_steps'] = int(round(config['max_steps']))
+        configs.append(config)
+    return configs
+
+def _check_spec(name, spec):
+    """ValueError unless spec is a non-empty list or a finite min < max range (positive when log)"""
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError(f"Random search needs at least one value for {name}")
+        return
+    if not isinstance(spec, dict) or 'min' not in spec or 'max' not in spec:
+        raise ValueError(f"Random search needs a list or a {{'min', 'max'}} range for {name}")
+    low, high = float(spec['min']), float(spec['max'])
+    if not (math.isfinite(low) and math.isfinite(high) and low < high):
+        raise ValueError(f"Range for {name} needs finite bounds with min < max")
+    if spec.get('log') and low <= 0:
+        raise ValueError(f"Log range for {name} needs min and max above 0")
+
+def rung_budgets(episodes, n_trials, eta=3, min_episodes=None):
+    """Cumulative episode budget of each rung, ending at `episodes`"""
+    rungs = 1 + int(math.log(max(n_trials, 1), eta) + 1e-9)
+    budgets = [max(1, episodes // eta ** (rungs - 1 - k)) for k in range(rungs)]
+    if min_episodes:
+        budgets = [b for b in budgets if b >= min_episodes] or [episodes]
+    return sorted(set(budgets))
+
+def trial_score(result, metric):
+    """Higher is better; failed trials score -inf"""
+    if result is None:
+        return float('-inf')
+    if metric == 'success_rate':
+        return float(result['success_rate'])
+    value = result['detailed_metrics'].get(metric)
+    return float('-inf') if value is None else float(value)
+
+def _score_key(trial):
+    return float('-inf') if trial['score'] is None else trial['score']
+
+class SuccessiveHalving:
+    """Tracks which trials are still running and their scores at each rung"""
+
+    def __init__(self, configs, budgets, eta=3, metric='avg_return'):
+        self.budgets = budgets
+        self.eta = eta
+        self.metric = metric
+        self.rung = 0
+        self.trials = [
+            {'trial': i, 'config': config, 'rung': None, 'episodes': 0, 'score': None, 'success_rate': None, 'result': None}
+            for i, config in enumerate(configs)
+        ]
+        self.active = list(self.trials)
+
+    @property
+    def finished(self):
+        return self.rung >= len(self.budgets)
+
+    def episodes_to_run(self, trial):
+        """Episodes a trial still needs to reach the current rung's budget"""
+        return self.budgets[self.rung] - trial['episodes']
+
+    def record(self, trial, result):
+        """Store a trial's result for the current rung (None if it failed)"""
+        trial['rung'] = self.rung
+        trial['episodes'] = self.budgets[self.rung]
+        score = trial_score(result, self.metric)
+        trial['score'] = score if math.isfinite(score) else None  # None keeps responses JSON-safe
+        trial['success_rate'] = None if result is None else result['success_rate']
+        trial['result'] = result
+
+    def promote(self):
+        """Keep the best 1/eta of the active trials and move to the next rung"""
+        ranked = sorted(self.active, key=_score_key, reverse=True)
+        keep = max(1, len(ranked) // self.eta)
+        if self.rung + 1 >= len(self.budgets):
+            keep = len(ranked)  # nothing left to cut; keep results for the final ranking
+        for trial in ranked[keep:]:
+            trial['result'] = None  # cut trials no longer need their Q-tables
+        self.active = ranked[:keep]
+        self.rung += 1
+
+    def best(self):
+        """The highest ranked trial, including its last result"""
+        return self.leaderboard(results=True)[0]
+
+    def leaderboard(self, results=False):
+        """Trials ranked by the furthest rung reached, then score"""
+        ranked = sorted(
+            self.trials,
+            key=lambda t: (-1 if t['rung'] is None else t['rung'], _score_key(t)),
+            reverse=True,
+        )
+        if results:
+            return ranked
+        return [{key: value for key, value in trial.items() if key != 'result'} for trial in ranked]
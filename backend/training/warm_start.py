@@ -0,0 +1,29 @@
+import numpy as np
+
+def remap_q_table(q_table, rows, cols, base, new_rows, new_cols):
+    """Copy Q-values onto a grid of another size by matching (row, col).
+    
+    base is the new agent's initial table; cells outside the overlap of
+    the two grids keep its values.
+    """
+    old = np.asarray(q_table, dtype=float).reshape(rows, cols, -1)
+    new = np.array(base, dtype=float).reshape(new_rows, new_cols, -1)
+    overlap_rows, overlap_cols = min(rows, new_rows), min(cols, new_cols)
+    new[:overlap_rows, :overlap_cols] = old[:overlap_rows, :overlap_cols]
+    return new.reshape(new_rows * new_cols, -1)
+
+def warm_start_q_table(source, env, base):
+    """Initial Q-table for env from a previous job's table.
+    
+    source is {'q_table': [...], 'rows': r, 'cols': c}; rows/cols may be
+    missing for uploaded tables, which must then match env's state count.
+    """
+    q_table = np.asarray(source['q_table'], dtype=float)
+    if q_table.ndim != 2 or q_table.shape[1] != env.n_actions:
+        raise ValueError(f"Warm-start Q-table must have shape (n_states, {env.n_actions})")
+    rows, cols = source.get('rows'), source.get('cols')
+    if rows and cols and rows * cols == len(q_table):
+        return remap_q_table(q_table, rows, cols, base, env.rows, env.cols)
+    if len(q_table) != env.n_states:
+        raise ValueError(f"Warm-start Q-table has {len(q_table)} states, maze has {env.n_states}")
+    return q_table
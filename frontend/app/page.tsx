@@ -8,6 +8,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription } f
 import { Tooltip, TooltipContent, TooltipProvider, TooltipTrigger } from "@/components/ui/tooltip"
 import { Loader2, Play, RotateCcw, TrendingUp, Shuffle, BarChart3, Edit3, Save, Upload, Download, Grid3x3, Eye, EyeOff, Sparkles, X } from "lucide-react"
 import dynamic from 'next/dynamic'
+import { fetchPolicy } from "@/lib/policy"
 
 const Plot = dynamic(() => import('react-plotly.js'), { ssr: false })
 
@@ -22,8 +23,10 @@ interface BackendStatus {
   episodes: number
   avg_reward: number | null
   success_rate: number | null
-  policy: (number | null)[] | null
-  q_table: number[][] | null
+  policy?: (number | null)[] | null
+  q_table?: number[][] | null
+  rows?: number
+  cols?: number
   logs: number[]
 }
 
@@ -68,6 +71,10 @@ interface MetricsResponse {
   episode_returns_history: number[] | null
   episode_lengths_history: number[] | null
   loss_history: number[] | null
+  // Stored-point index of every value when the histories were downsampled (?points=)
+  history_indices: Record<string, number[] | null> | null
+  history_totals: Record<string, number | null>
+  history_stride: number
   success_rate: number | null
   avg_reward: number | null
 }
@@ -82,6 +89,7 @@ export default function MazeSolver() {
   const [mcMethod, setMcMethod] = useState<"first_visit" | "every_visit">("first_visit")
   const [epsilonDecay, setEpsilonDecay] = useState(0.9996)
   const [minEpsilon, setMinEpsilon] = useState(0.05)
+  const [warmStart, setWarmStart] = useState(false)
   const [trainingStatus, setTrainingStatus] = useState<TrainingStatus>({ status: "idle" })
   const [isPolling, setIsPolling] = useState(false)
   const [jobId, setJobId] = useState<string | null>(null)
@@ -987,8 +995,10 @@ export default function MazeSolver() {
           epsilon_decay: epsilonDecay,
           min_epsilon: minEpsilon,
           maze: flatMaze,
-          rows: 16,
-          cols: 17
+          rows: maze.length,
+          cols: maze[0].length,
+          // Seed the Q-table from the previous finished run (e.g. after a small maze edit)
+          warm_start_job_id: warmStart && trainingStatus.status === "completed" ? jobId : undefined
         }),
       })
 
@@ -1010,71 +1020,80 @@ export default function MazeSolver() {
     try {
       const response = await fetch(`${API_URL}/status/${jobId}`)
       const data: BackendStatus = await response.json()
-      
-      // Add training logs at milestones
-      const progress = data.progress
-      if (progress === 25 || progress === 50 || progress === 75) {
-        setTrainingLogs(prev => {
-          const lastLog = prev[prev.length - 1]
-          if (!lastLog?.includes(`${progress}%`)) {
-            return [...prev, `⏳ Progress: ${progress}% (Episode ${data.episode}/${data.episodes})`]
-          }
-          return prev
-        })
-      }
-      
-      if (data.avg_reward !== null && data.episode % 100 === 0) {
-        setTrainingLogs(prev => {
-          const lastLog = prev[prev.length - 1]
-          if (!lastLog?.includes(`Episode ${data.episode}`)) {
-            const successRate = data.success_rate !== null ? (data.success_rate * 100).toFixed(1) : '0.0'
-            const avgReward = data.avg_reward !== null ? data.avg_reward.toFixed(2) : '0.00'
-            return [...prev, `📈 Episode ${data.episode}: Avg Reward = ${avgReward}, Success Rate = ${successRate}%`]
-          }
-          return prev
-        })
-      }
-      
-      // Convert backend status to frontend format
-      const frontendStatus: TrainingStatus = {
-        status: data.status === "finished" ? "completed" : 
-                data.status === "running" || data.status === "queued" ? "training" : 
-                data.status === "error" ? "error" : "idle",
-        episode: data.episode,
-        total_episodes: data.episodes,
-        rewards: data.logs,
+      // /status is lean; the learned policy and Q-table are fetched once, in binary
+      if (data.status === "finished" && !data.policy) {
+        Object.assign(data, await fetchPolicy(API_URL, jobId))
       }
-      
-      // Convert flattened policy to 2D grid
-      if (data.policy && data.status === "finished") {
-        const policy2D: (number | null)[][] = []
-        for (let r = 0; r < 16; r++) {
-          const row: (number | null)[] = []
-          for (let c = 0; c < 17; c++) {
-            row.push(data.policy[r * 17 + c])
-          }
-          policy2D.push(row)
+      applyStatus(data)
+    } catch (error) {
+      console.error("Failed to check status:", error)
+    }
+  }
+
+  const applyStatus = (data: BackendStatus) => {
+    // Add training logs at milestones
+    const progress = data.progress
+    if (progress === 25 || progress === 50 || progress === 75) {
+      setTrainingLogs(prev => {
+        const lastLog = prev[prev.length - 1]
+        if (!lastLog?.includes(`${progress}%`)) {
+          return [...prev, `⏳ Progress: ${progress}% (Episode ${data.episode}/${data.episodes})`]
         }
-        frontendStatus.policy = policy2D
-        
-        // Store Q-table if available
-        if (data.q_table) {
-          setQTable(data.q_table)
+        return prev
+      })
+    }
+    
+    if (data.avg_reward !== null && data.episode % 100 === 0) {
+      setTrainingLogs(prev => {
+        const lastLog = prev[prev.length - 1]
+        if (!lastLog?.includes(`Episode ${data.episode}`)) {
+          const successRate = data.success_rate !== null ? (data.success_rate * 100).toFixed(1) : '0.0'
+          const avgReward = data.avg_reward !== null ? data.avg_reward.toFixed(2) : '0.00'
+          return [...prev, `📈 Episode ${data.episode}: Avg Reward = ${avgReward}, Success Rate = ${successRate}%`]
         }
-        
-        // Add completion log
-        const finalSuccessRate = data.success_rate !== null ? (data.success_rate * 100).toFixed(1) : '0.0'
-        setTrainingLogs(prev => [...prev, `🎉 Training completed! Final success rate: ${finalSuccessRate}%`])
-        setTrainingLogs(prev => [...prev, `✨ Policy learned and ready for simulation!`])
+        return prev
+      })
+    }
+    
+    // Convert backend status to frontend format
+    const frontendStatus: TrainingStatus = {
+      status: data.status === "finished" ? "completed" : 
+              data.status === "running" || data.status === "queued" ? "training" : 
+              data.status === "error" ? "error" : "idle",
+      episode: data.episode,
+      total_episodes: data.episodes,
+      rewards: data.logs,
+    }
+    
+    // Convert flattened policy to 2D grid
+    if (data.policy && data.status === "finished") {
+      const rows = data.rows ?? maze.length
+      const cols = data.cols ?? maze[0].length
+      const policy2D: (number | null)[][] = []
+      for (let r = 0; r < rows; r++) {
+        const row: (number | null)[] = []
+        for (let c = 0; c < cols; c++) {
+          row.push(data.policy[r * cols + c])
+        }
+        policy2D.push(row)
       }
+      frontendStatus.policy = policy2D
       
-      setTrainingStatus(frontendStatus)
-
-      if (data.status === "finished" || data.status === "error") {
-        setIsPolling(false)
+      // Store Q-table if available
+      if (data.q_table) {
+        setQTable(data.q_table)
       }
-    } catch (error) {
-      console.error("Failed to check status:", error)
+      
+      // Add completion log
+      const finalSuccessRate = data.success_rate !== null ? (data.success_rate * 100).toFixed(1) : '0.0'
+      setTrainingLogs(prev => [...prev, `🎉 Training completed! Final success rate: ${finalSuccessRate}%`])
+      setTrainingLogs(prev => [...prev, `✨ Policy learned and ready for simulation!`])
+    }
+    
+    setTrainingStatus(frontendStatus)
+
+    if (data.status === "finished" || data.status === "error") {
+      setIsPolling(false)
     }
   }
 
@@ -1106,7 +1125,8 @@ export default function MazeSolver() {
 
     setLoadingMetrics(true)
     try {
-      const response = await fetch(`${API_URL}/metrics/${jobId}`)
+      // The charts are a few hundred pixels wide; let the server downsample long histories
+      const response = await fetch(`${API_URL}/metrics/${jobId}?points=400`)
       const data: MetricsResponse = await response.json()
       
       if (data.status === "finished" && data.detailed_metrics) {
@@ -1289,9 +1309,45 @@ export default function MazeSolver() {
   }
 
   useEffect(() => {
-    if (isPolling && jobId) {
-      const interval = setInterval(checkStatus, 1000)
-      return () => clearInterval(interval)
+    if (!isPolling || !jobId) return
+    
+    // Stream progress deltas from the backend; fall back to polling /status if the stream fails
+    let interval: ReturnType<typeof setInterval> | null = null
+    const startPolling = () => {
+      if (!interval) interval = setInterval(checkStatus, 1000)
+    }
+    if (typeof EventSource === "undefined") {
+      startPolling()
+      return () => { if (interval) clearInterval(interval) }
+    }
+    
+    let snapshot: BackendStatus | null = null
+    const source = new EventSource(`${API_URL}/events/${jobId}`)
+    source.onmessage = (event) => {
+      const { type, rewards, ...fields } = JSON.parse(event.data)
+      const previous: BackendStatus = snapshot ?? {
+        status: "queued", progress: 0, episode: 0, episodes: episodes,
+        avg_reward: null, success_rate: null, policy: null, q_table: null, logs: [],
+      }
+      snapshot = { ...previous, ...fields, logs: [...previous.logs, ...(rewards ?? [])].slice(-200) }
+      if (type === "finished" || type === "error") source.close()
+      // Large mazes finish without an inline policy; fetch it in binary instead
+      if (type === "finished" && !snapshot.policy) {
+        const finished = snapshot
+        fetchPolicy(API_URL, jobId)
+          .then((policyData) => applyStatus({ ...finished, ...policyData }))
+          .catch(() => applyStatus(finished))
+        return
+      }
+      applyStatus(snapshot)
+    }
+    source.onerror = () => {
+      source.close()
+      startPolling()
+    }
+    return () => {
+      source.close()
+      if (interval) clearInterval(interval)
     }
   }, [isPolling, jobId])
 
@@ -1491,7 +1547,7 @@ export default function MazeSolver() {
   const getHeatmapValue = (row: number, col: number): number => {
     if (!qTable || maze[row][col] === 0) return 0
     
-    const stateIndex = row * 17 + col
+    const stateIndex = row * maze[0].length + col
     if (stateIndex >= qTable.length) return 0
     
     // Get max Q-value for this state
@@ -1575,27 +1631,48 @@ export default function MazeSolver() {
     return "bg-white border border-gray-200 hover:bg-gray-50 transition-colors"
   }
 
-  const SimpleRewardChart = ({ rewards, totalEpisodes }: { rewards: number[], totalEpisodes?: number }) => {
+  // Episode number (1-based) of every chart point: the given sampled episodes, else the last N of the run
+  const chartEpisodes = (length: number, totalEpisodes?: number, episodes?: number[]) => {
+    if (episodes && episodes.length === length) return episodes
+    const actualTotal = totalEpisodes || length
+    const startEpisode = actualTotal > length ? actualTotal - length + 1 : 1
+    return Array.from({ length }, (_, index) => startEpisode + index)
+  }
+
+  const ChartCaption = ({ points, totalEpisodes, sampled }: { points: number, totalEpisodes: number, sampled: boolean }) => {
+    if (totalEpisodes <= points) return null
+    return (
+      <p className="text-xs text-slate-600 italic text-center">
+        {sampled ? `${points} points sampled across all ${totalEpisodes} episodes` : `Showing last ${points} of ${totalEpisodes} episodes`}
+      </p>
+    )
+  }
+
+  // Episode numbers of a downsampled /metrics history (stored-point index x stride, 1-based)
+  const historyEpisodes = (metrics: MetricsResponse, field: string) => {
+    const indices = metrics.history_indices?.[field]
+    return indices ? indices.map(index => index * metrics.history_stride + 1) : undefined
+  }
+
+  const SimpleRewardChart = ({ rewards, totalEpisodes, episodes }: { rewards: number[], totalEpisodes?: number, episodes?: number[] }) => {
     if (!rewards || rewards.length === 0) return null
 
     const maxReward = Math.max(...rewards)
     const minReward = Math.min(...rewards)
     const range = maxReward - minReward || 1
-    const actualTotal = totalEpisodes || rewards.length
-
-    // Calculate start episode (if showing last 200 of more episodes)
-    const startEpisode = actualTotal > rewards.length ? actualTotal - rewards.length + 1 : 1
+    const pointEpisodes = chartEpisodes(rewards.length, totalEpisodes, episodes)
+    const actualTotal = Math.max(totalEpisodes || 0, pointEpisodes[pointEpisodes.length - 1])
 
     return (
       <div className="space-y-1">
         <div className="flex justify-between text-xs text-gray-600">
-          <span>Episode {startEpisode}</span>
-          <span>Episode {actualTotal}</span>
+          <span>Episode {pointEpisodes[0]}</span>
+          <span>Episode {pointEpisodes[pointEpisodes.length - 1]}</span>
         </div>
         <div className="h-24 bg-gray-50 rounded-lg p-2 flex items-end" style={{ gap: '1px' }}>
           {rewards.map((reward, index) => {
             const height = ((reward - minReward) / range) * 100
-            const actualEpisode = startEpisode + index
+            const actualEpisode = pointEpisodes[index]
             return (
               <div
                 key={index}
@@ -1610,31 +1687,25 @@ export default function MazeSolver() {
           <span>Min: {minReward.toFixed(2)}</span>
           <span>Max: {maxReward.toFixed(2)}</span>
         </div>
-        {actualTotal > rewards.length && (
-          <p className="text-xs text-slate-600 italic text-center">
-            Showing last {rewards.length} of {actualTotal} episodes
-          </p>
-        )}
+        <ChartCaption points={rewards.length} totalEpisodes={actualTotal} sampled={pointEpisodes === episodes} />
       </div>
     )
   }
 
-  const SimpleLossChart = ({ losses, totalEpisodes }: { losses: number[], totalEpisodes?: number }) => {
+  const SimpleLossChart = ({ losses, totalEpisodes, episodes }: { losses: number[], totalEpisodes?: number, episodes?: number[] }) => {
     if (!losses || losses.length === 0) return null
 
     const maxLoss = Math.max(...losses)
     const minLoss = Math.min(...losses)
     const range = maxLoss - minLoss || 1
-    const actualTotal = totalEpisodes || losses.length
-
-    // Calculate start episode (if showing last 200 of more episodes)
-    const startEpisode = actualTotal > losses.length ? actualTotal - losses.length + 1 : 1
+    const pointEpisodes = chartEpisodes(losses.length, totalEpisodes, episodes)
+    const actualTotal = Math.max(totalEpisodes || 0, pointEpisodes[pointEpisodes.length - 1])
 
     return (
       <div className="space-y-1">
         <div className="flex justify-between text-xs text-gray-600">
-          <span>Episode {startEpisode}</span>
-          <span>Episode {actualTotal}</span>
+          <span>Episode {pointEpisodes[0]}</span>
+          <span>Episode {pointEpisodes[pointEpisodes.length - 1]}</span>
         </div>
         <div className="h-24 bg-gray-50 rounded-lg p-2 flex items-end overflow-hidden" style={{ gap: '1px' }}>
           {losses.map((loss, index) => {
@@ -1642,7 +1713,7 @@ export default function MazeSolver() {
             const height = range > 0 ? ((loss - minLoss) / range) * 100 : 0
             // Cap height at 100% to prevent overflow, with minimum visible height
             const clampedHeight = Math.min(Math.max(height, 0.5), 100)
-            const actualEpisode = startEpisode + index
+            const actualEpisode = pointEpisodes[index]
             return (
               <div
                 key={index}
@@ -1657,11 +1728,7 @@ export default function MazeSolver() {
           <span>Min: {minLoss.toFixed(4)}</span>
           <span>Max: {maxLoss.toFixed(4)}</span>
         </div>
-        {actualTotal > losses.length && (
-          <p className="text-xs text-slate-600 italic text-center">
-            Showing last {losses.length} of {actualTotal} episodes
-          </p>
-        )}
+        <ChartCaption points={losses.length} totalEpisodes={actualTotal} sampled={pointEpisodes === episodes} />
       </div>
     )
   }
@@ -1762,6 +1829,16 @@ export default function MazeSolver() {
                   {validationErrors.episodes && (
                     <p className="text-xs text-red-500 mt-1">Must be between 1 and 10000</p>
                   )}
+                  {jobId && trainingStatus.status === "completed" && (
+                    <label className="flex items-center gap-2 text-xs text-slate-700 mt-1">
+                      <input
+                        type="checkbox"
+                        checked={warmStart}
+                        onChange={(e) => setWarmStart(e.target.checked)}
+                      />
+                      Warm start from last run
+                    </label>
+                  )}
                 </div>
                 
                 {/* Alpha - ONLY for Q-Learning and SARSA */}
@@ -2206,7 +2283,7 @@ export default function MazeSolver() {
                     
                     // Calculate heatmap overlay
                     const heatmapValue = showHeatmap ? getHeatmapValue(rowIndex, colIndex) : 0
-                    const maxHeatmapValue = showHeatmap && qTable ? Math.max(...qTable.flat().flat()) : 1
+                    const maxHeatmapValue = showHeatmap && qTable ? qTable.reduce((best, values) => Math.max(best, ...values), -Infinity) : 1
                     const heatmapColor = showHeatmap && heatmapValue > 0 ? getHeatmapColor(heatmapValue, maxHeatmapValue) : ''
                     
                     // Use heatmap color if showing heatmap, otherwise use normal cell color
@@ -2303,7 +2380,7 @@ export default function MazeSolver() {
                     </h3>
                     <SimpleRewardChart 
                       rewards={trainingStatus.rewards} 
-                      totalEpisodes={trainingStatus.total_episodes}
+                      totalEpisodes={trainingStatus.episode || trainingStatus.total_episodes}
                     />
                   </Card>
                 )}
@@ -2317,7 +2394,8 @@ export default function MazeSolver() {
                     </h3>
                     <SimpleLossChart 
                       losses={detailedMetrics.loss_history} 
-                      totalEpisodes={detailedMetrics.loss_history.length}
+                      totalEpisodes={(detailedMetrics.history_totals.loss_history ?? 0) * detailedMetrics.history_stride}
+                      episodes={historyEpisodes(detailedMetrics, "loss_history")}
                     />
                     <div className="text-xs text-slate-600 mt-1">
                       Lower loss = better value approximation
@@ -2432,9 +2510,9 @@ export default function MazeSolver() {
                 data={[
                   {
                     type: 'surface',
-                    z: Array.from({ length: 16 }, (_, row) =>
-                      Array.from({ length: 17 }, (_, col) => {
-                        const stateIndex = row * 17 + col
+                    z: Array.from({ length: maze.length }, (_, row) =>
+                      Array.from({ length: maze[0].length }, (_, col) => {
+                        const stateIndex = row * maze[0].length + col
                         if (maze[row][col] === 0) return 0
                         const qValues = qTable[stateIndex]
                         if (!qValues || qValues.length === 0) return 0
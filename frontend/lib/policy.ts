@@ -0,0 +1,60 @@
+// Decoder for GET /policy/{job_id}.bin; the layout is documented in backend/training/encoding.py
+export interface PolicyData {
+  policy: (number | null)[]
+  q_table: number[][]
+  rows: number
+  cols: number
+}
+
+const HEADER_BYTES = 24
+
+export function decodePolicyBinary(buffer: ArrayBuffer): PolicyData {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  const version = view.getUint8(4)
+  if (magic !== "MAZQ" || (version !== 1 && version !== 2)) {
+    throw new Error("Unexpected policy format")
+  }
+  const itemSize = view.getUint8(5)
+  const rows = view.getUint32(8, true)
+  const cols = view.getUint32(12, true)
+  const nStates = view.getUint32(16, true)
+  const nActions = view.getUint32(20, true)
+
+  // Version 2 (sparse) only carries the states set in a little-endian bitmap
+  let present: (s: number) => boolean = () => true
+  let offset = HEADER_BYTES
+  let count = nStates
+  if (version === 2) {
+    const bitmap = new Uint8Array(buffer, HEADER_BYTES, Math.ceil(nStates / 8))
+    present = (s) => ((bitmap[s >> 3] >> (s & 7)) & 1) === 1
+    count = 0
+    for (let s = 0; s < nStates; s++) if (present(s)) count++
+    offset += bitmap.length
+  }
+
+  // slice() copies, so the typed array is aligned whatever the bitmap length
+  const valueBytes = buffer.slice(offset, offset + count * nActions * itemSize)
+  const values = itemSize === 4 ? new Float32Array(valueBytes) : new Float64Array(valueBytes)
+  const actions = new Int8Array(buffer, offset + count * nActions * itemSize, count)
+
+  const q_table: number[][] = []
+  const policy: (number | null)[] = []
+  for (let s = 0, k = 0; s < nStates; s++) {
+    if (!present(s)) {
+      q_table.push(new Array(nActions).fill(0))
+      policy.push(null)
+      continue
+    }
+    q_table.push(Array.from(values.subarray(k * nActions, (k + 1) * nActions)))
+    policy.push(actions[k] < 0 ? null : actions[k])
+    k++
+  }
+  return { policy, q_table, rows, cols }
+}
+
+export async function fetchPolicy(apiUrl: string, jobId: string): Promise<PolicyData> {
+  const response = await fetch(`${apiUrl}/policy/${jobId}.bin`)
+  if (!response.ok) throw new Error("Failed to fetch policy")
+  return decodePolicyBinary(await response.arrayBuffer())
+}